@@ -6,6 +6,7 @@ from typing import Dict, Any, List
 from common_lib.alpaca_helpers.async_impl.trading_client import AsyncTradingClient
 from common_lib.alpaca_helpers.simulation.trading_client import SimulationTradingClient
 from common_lib.alpaca_helpers.env import AlpacaSettings
+from common_lib.mcp import MARKET_TZ
 
 # Assume you're using the same resource pattern as before:
 from mcp.server.fastmcp.resources import FunctionResource, ResourceTemplate
@@ -13,7 +14,6 @@ from mcp.server.fastmcp.resources import FunctionResource, ResourceTemplate
 # Alpaca imports:
 from alpaca.trading.enums import OrderStatus, OrderType, QueryOrderStatus
 from alpaca.trading.requests import GetOrdersRequest
-import pytz
 
 logger = getLogger(__name__)
 
@@ -167,7 +167,7 @@ async def get_completed_orders(symbol: str) -> Dict[str, List[Dict[str, Any]]]:
                 "status": o.status.value.lower(),
                 "filled_size": float(o.filled_qty),
                 "filled_avg_price": float(o.filled_avg_price) if o.filled_avg_price else None,
-                "filled_at": o.filled_at.astimezone(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d %H:%M:%S') if o.filled_at else None,
+                "filled_at": o.filled_at.astimezone(MARKET_TZ).strftime('%Y-%m-%d %H:%M:%S') if o.filled_at else None,
                 "position_intent": o.position_intent.value.lower() if o.position_intent else None
             })
     
@@ -232,7 +232,7 @@ async def get_open_orders(symbol: str) -> Dict[str, List[Dict[str, Any]]]:
             "type": o.type.value.lower(),
             "price": float(o.limit_price) if o.type == OrderType.LIMIT else float(o.stop_price) if o.type in [OrderType.STOP, OrderType.STOP_LIMIT, OrderType.TRAILING_STOP] else None,
             "position_intent": o.position_intent.value.lower() if o.position_intent else None,
-            "created_at": o.created_at.astimezone(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d %H:%M:%S') if o.created_at else None
+            "created_at": o.created_at.astimezone(MARKET_TZ).strftime('%Y-%m-%d %H:%M:%S') if o.created_at else None
         })
     
     return {"orders": result}
@@ -3,6 +3,7 @@ import base64
 from abc import ABC
 from collections import defaultdict
 from collections.abc import Callable
+from decimal import Decimal
 from enum import Enum
 from itertools import chain
 from typing import (
@@ -16,6 +17,7 @@ from typing import (
 )
 
 import httpx
+import orjson
 from pydantic import BaseModel
 
 from alpaca import __version__
@@ -69,6 +71,16 @@ def _get_marketdata_entries(response: HTTPResult, no_sub_key: bool) -> RawData:
     return response[selected_key]
 
 
+def _json_default(obj: Any) -> Any:
+    """
+    Fallback encoder for request bodies. orjson already handles UUID,
+    datetime and Enum values natively; Decimal is sent as a string.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 # --------------------------------------------------------------------------
 # AsyncRestClient class
 # --------------------------------------------------------------------------
@@ -152,8 +164,10 @@ class AsyncRestClient(ABC):
         # Decide whether to send data as query params or JSON
         if method.upper() in ["GET", "DELETE"]:
             opts["params"] = data
-        else:
-            opts["json"] = data
+        elif data is not None:
+            # Encode the body with orjson instead of letting httpx use the stdlib json module
+            headers["Content-Type"] = "application/json"
+            opts["content"] = orjson.dumps(data, default=_json_default)
 
         # Attempt the request with retries
         retry = self._retry
@@ -1,13 +1,16 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
 from common_lib.alpaca_helpers.async_impl.async_rest import AsyncRestClient
 from typing import Union
 
+import pandas as pd
+
 from alpaca.common.enums import BaseURL
 from alpaca.common.types import RawData
 from alpaca.data import Bar, Quote, Snapshot, Trade
 from alpaca.data.historical.utils import (
     parse_obj_as_symbol_dict,
 )
+from alpaca.data.mappings import BAR_MAPPING
 from alpaca.data.models import BarSet, QuoteSet, TradeSet
 from alpaca.data.requests import (
     StockBarsRequest,
@@ -19,6 +22,9 @@ from alpaca.data.requests import (
     StockTradesRequest,
 )
 
+# Columns of BarSet.df, in the same order
+BAR_COLUMNS = ("open", "high", "low", "close", "volume", "trade_count", "vwap")
+
 class AsyncStockHistoricalDataClient(AsyncRestClient):
     def __init__(
         self,
@@ -85,6 +91,42 @@ class AsyncStockHistoricalDataClient(AsyncRestClient):
 
         return BarSet(raw_bars)
 
+    async def get_stock_bars_df(
+        self, request_params: StockBarsRequest, columns: Sequence[str] = BAR_COLUMNS
+    ) -> pd.DataFrame:
+        """Returns bar data as a dataframe indexed by (symbol, timestamp), like BarSet.df.
+
+        The frame is built column-wise straight from the raw response instead of parsing
+        every bar into a Bar model first, and only the requested columns are kept.
+
+        Args:
+            request_params (GetStockBarsRequest): The request object for retrieving stock bar data.
+            columns (Sequence[str]): The bar columns to keep. Defaults to all of them.
+
+        Returns:
+            pd.DataFrame: The bar data, with float columns as in BarSet.df
+        """
+        raw_bars = await self._get_marketdata(
+            path="/stocks/bars",
+            params=request_params.to_request_fields(),
+        )
+
+        symbols = []
+        records = []
+        for symbol, bars in raw_bars.items():
+            bars = [bar for bar in bars if bar is not None]
+            symbols.extend([symbol] * len(bars))
+            records.extend(bars)
+
+        df = pd.DataFrame.from_records(records).rename(columns=BAR_MAPPING)
+        index = pd.MultiIndex.from_arrays(
+            [symbols, pd.to_datetime(df["timestamp"], utc=True) if records else pd.DatetimeIndex([], tz="UTC")],
+            names=["symbol", "timestamp"],
+        )
+        # BarSet.df drops fields the API left out, so only keep the requested ones it sent
+        kept = [column for column in columns if column in df.columns]
+        return df[kept].astype("float64").set_axis(index)
+
     async def get_stock_quotes(
         self, request_params: StockQuotesRequest
     ) -> Union[QuoteSet, RawData]:
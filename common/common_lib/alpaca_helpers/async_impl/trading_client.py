@@ -1,6 +1,8 @@
+import asyncio
+from datetime import date, datetime, timezone
 from uuid import UUID
 from common_lib.alpaca_helpers.async_impl.async_rest import AsyncRestClient
-from pydantic import TypeAdapter
+from pydantic import BaseModel, TypeAdapter
 
 from alpaca.common import RawData
 from alpaca.common.utils import (
@@ -8,8 +10,9 @@ from alpaca.common.utils import (
     validate_uuid_id_param,
     validate_symbol_or_asset_id,
 )
-from typing import Optional, List, Union
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence, Tuple, Type, Union
 from alpaca.common.enums import BaseURL
+from alpaca.common.requests import NonEmptyRequest
 
 from alpaca.trading.requests import (
     ClosePositionRequest,
@@ -36,6 +39,75 @@ from alpaca.trading.models import (
     AccountConfiguration,
 )
 
+# Field names of each request class, computed on first use
+_REQUEST_FIELD_NAMES: Dict[Type[NonEmptyRequest], Tuple[str, ...]] = {}
+
+# Response adapters, built once at import instead of on every call
+_ORDER_LIST_ADAPTER = TypeAdapter(List[Order])
+_CANCEL_ORDER_LIST_ADAPTER = TypeAdapter(List[CancelOrderResponse])
+_POSITION_LIST_ADAPTER = TypeAdapter(List[Position])
+_CLOSE_POSITION_LIST_ADAPTER = TypeAdapter(List[ClosePositionResponse])
+_ASSET_LIST_ADAPTER = TypeAdapter(List[Asset])
+_WATCHLIST_LIST_ADAPTER = TypeAdapter(List[Watchlist])
+_OPTION_CONTRACT_LIST_ADAPTER = TypeAdapter(List[OptionContract])
+_OPTION_CONTRACTS_RESPONSE_ADAPTER = TypeAdapter(OptionContractsResponse)
+_OPTION_CONTRACT_ADAPTER = TypeAdapter(OptionContract)
+
+
+def _request_value(value: Any) -> Any:
+    """
+    Converts a request value to its wire form, mirroring `NonEmptyRequest.to_request_fields`.
+    """
+    if isinstance(value, BaseModel):
+        value = value.model_dump(exclude_none=True)
+
+    if isinstance(value, UUID):
+        return str(value)
+
+    if isinstance(value, dict):
+        return {k: _request_value(v) for k, v in value.items()}
+
+    if isinstance(value, list):
+        return [_request_value(v) for v in value]
+
+    # RFC 3339, naive datetimes are assumed to be UTC
+    if isinstance(value, datetime):
+        if value.tzinfo is None or value.tzinfo.utcoffset(value) is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    return value
+
+
+def _request_fields(request: NonEmptyRequest) -> Dict[str, Any]:
+    """
+    Same result as `request.to_request_fields()`, but reads the set values straight off the
+    request instead of building a full `model_dump` of it first.
+    """
+    request_type = type(request)
+    names = _REQUEST_FIELD_NAMES.get(request_type)
+    if names is None:
+        names = _REQUEST_FIELD_NAMES[request_type] = tuple(request_type.model_fields)
+
+    fields = {}
+    for name in names:
+        value = getattr(request, name)
+        if value is None:
+            continue
+        value = _request_value(value)
+        if value != {} and len(str(value)) > 0:
+            fields[name] = value
+
+    if "symbol_or_symbols" in fields:
+        symbols = fields.pop("symbol_or_symbols")
+        fields["symbols"] = ",".join(symbols) if isinstance(symbols, list) else symbols
+
+    return fields
+
+
 class AsyncTradingClient(AsyncRestClient):
     def __init__(
         self,
@@ -81,7 +153,7 @@ class AsyncTradingClient(AsyncRestClient):
         Returns:
             alpaca.trading.models.Order: The resulting submitted order.
         """
-        data = order_data.to_request_fields()
+        data = _request_fields(order_data)
         response = await self.post("/orders", data)
 
         if self._use_raw_data:
@@ -89,6 +161,35 @@ class AsyncTradingClient(AsyncRestClient):
 
         return Order(**response)
 
+    async def submit_orders(
+        self, orders: Sequence[OrderRequest], max_concurrency: int = 20
+    ) -> List[Union[Order, RawData, Exception]]:
+        """Creates several orders at once. The requests are sent concurrently, with at most
+        `max_concurrency` of them in flight at a time to stay within the API rate limit.
+
+        A failed request does not stop the others: its exception is returned in its slot of the
+        result list instead of being raised, so callers should check each entry.
+
+        Args:
+            orders (Sequence[alpaca.trading.requests.OrderRequest]): The request data for each new order.
+            max_concurrency (int): The maximum number of order requests in flight at once.
+
+        Returns:
+            List[Union[alpaca.trading.models.Order, Exception]]: The submitted order, or the exception
+                raised while submitting it, for each request, in the same order as the requests.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _submit(order_data: OrderRequest) -> Union[Order, RawData]:
+            async with semaphore:
+                return await self.submit_order(order_data)
+
+        return list(
+            await asyncio.gather(
+                *(_submit(order_data) for order_data in orders), return_exceptions=True
+            )
+        )
+
     async def get_orders(
         self, filter: Optional[GetOrdersRequest] = None
     ) -> Union[List[Order], RawData]:
@@ -102,7 +203,7 @@ class AsyncTradingClient(AsyncRestClient):
             List[alpaca.trading.models.Order]: The queried orders.
         """
         # checking to see if we specified at least one param
-        params = filter.to_request_fields() if filter is not None else {}
+        params = _request_fields(filter) if filter is not None else {}
 
         if "symbols" in params and isinstance(params["symbols"], list):
             params["symbols"] = ",".join(params["symbols"])
@@ -112,7 +213,7 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(List[Order]).validate_python(response)
+        return _ORDER_LIST_ADAPTER.validate_python(response)
 
     async def get_order_by_id(
         self, order_id: Union[UUID, str], filter: Optional[GetOrderByIdRequest] = None
@@ -128,7 +229,7 @@ class AsyncTradingClient(AsyncRestClient):
             alpaca.trading.models.Order: The order that was queried.
         """
         # checking to see if we specified at least one param
-        params = filter.to_request_fields() if filter is not None else {}
+        params = _request_fields(filter) if filter is not None else {}
 
         order_id = validate_uuid_id_param(order_id, "order_id")
 
@@ -174,7 +275,7 @@ class AsyncTradingClient(AsyncRestClient):
             alpaca.trading.models.Order: The updated order.
         """
         # checking to see if we specified at least one param
-        params = order_data.to_request_fields() if order_data is not None else {}
+        params = _request_fields(order_data) if order_data is not None else {}
 
         order_id = validate_uuid_id_param(order_id, "order_id")
 
@@ -197,7 +298,7 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(List[CancelOrderResponse]).validate_python(response)
+        return _CANCEL_ORDER_LIST_ADAPTER.validate_python(response)
 
     async def cancel_order_by_id(self, order_id: Union[UUID, str]) -> None:
         """
@@ -231,7 +332,7 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(List[Position]).validate_python(response)
+        return _POSITION_LIST_ADAPTER.validate_python(response)
 
     async def get_open_position(
         self, symbol_or_asset_id: Union[UUID, str]
@@ -276,7 +377,7 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(List[ClosePositionResponse]).validate_python(response)
+        return _CLOSE_POSITION_LIST_ADAPTER.validate_python(response)
 
     async def close_position(
         self,
@@ -300,7 +401,7 @@ class AsyncTradingClient(AsyncRestClient):
         symbol_or_asset_id = validate_symbol_or_asset_id(symbol_or_asset_id)
         response = await self.delete(
             f"/positions/{symbol_or_asset_id}",
-            close_options.to_request_fields() if close_options else {},
+            _request_fields(close_options) if close_options else {},
         )
 
         if self._use_raw_data:
@@ -348,7 +449,7 @@ class AsyncTradingClient(AsyncRestClient):
         """
         response = await self.get(
             "/account/portfolio/history",
-            history_filter.to_request_fields() if history_filter else {},
+            _request_fields(history_filter) if history_filter else {},
         )
 
         if self._use_raw_data:
@@ -372,14 +473,14 @@ class AsyncTradingClient(AsyncRestClient):
             List[Asset]: The list of assets.
         """
         # checking to see if we specified at least one param
-        params = filter.to_request_fields() if filter is not None else {}
+        params = _request_fields(filter) if filter is not None else {}
 
         response = await self.get("/assets", params)
 
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(List[Asset]).validate_python(response)
+        return _ASSET_LIST_ADAPTER.validate_python(response)
 
     async def get_asset(self, symbol_or_asset_id: Union[UUID, str]) -> Union[Asset, RawData]:
         """
@@ -471,7 +572,7 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return result
 
-        return TypeAdapter(List[Watchlist]).validate_python(result)
+        return _WATCHLIST_LIST_ADAPTER.validate_python(result)
 
     # ############################## OPTIONS CONTRACTS ################################# #
 
@@ -490,7 +591,7 @@ class AsyncTradingClient(AsyncRestClient):
         if request is None:
             raise ValueError("request (GetOptionContractsRequest) is required")
 
-        params = request.to_request_fields()
+        params = _request_fields(request)
 
         if "underlying_symbols" in params and isinstance(
             request.underlying_symbols, list
@@ -502,7 +603,58 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(OptionContractsResponse).validate_python(response)
+        return _OPTION_CONTRACTS_RESPONSE_ADAPTER.validate_python(response)
+
+    async def iter_option_contracts(
+        self, request: GetOptionContractsRequest
+    ) -> AsyncIterator[Union[List[OptionContract], RawData]]:
+        """
+        Iterates over all option contracts matching the request, one page at a time.
+
+        Page tokens are only known once the previous page has arrived, so pages cannot be
+        requested all at once. Instead the next page is fetched in the background while the
+        caller processes the current one.
+
+        Args:
+            request (GetOptionContractsRequest): The parameters that option contracts can be queried by.
+
+        Returns:
+            AsyncIterator[Union[List[OptionContract], RawData]]: The option contracts of each page.
+        """
+        if request is None:
+            raise ValueError("request (GetOptionContractsRequest) is required")
+
+        params = _request_fields(request)
+
+        if "underlying_symbols" in params and isinstance(
+            request.underlying_symbols, list
+        ):
+            params["underlying_symbols"] = ",".join(request.underlying_symbols)
+
+        next_page = asyncio.create_task(self.get("/options/contracts", dict(params)))
+        try:
+            while next_page is not None:
+                response = await next_page
+                page_token = response.get("next_page_token")
+                next_page = (
+                    asyncio.create_task(
+                        self.get(
+                            "/options/contracts",
+                            {**params, "page_token": page_token},
+                        )
+                    )
+                    if page_token
+                    else None
+                )
+
+                contracts = response.get("option_contracts") or []
+                if self._use_raw_data:
+                    yield contracts
+                else:
+                    yield _OPTION_CONTRACT_LIST_ADAPTER.validate_python(contracts)
+        finally:
+            if next_page is not None:
+                next_page.cancel()
 
     async def get_option_contract(
         self, symbol_or_id: Union[UUID, str]
@@ -524,4 +676,4 @@ class AsyncTradingClient(AsyncRestClient):
         if self._use_raw_data:
             return response
 
-        return TypeAdapter(OptionContract).validate_python(response)
\ No newline at end of file
+        return _OPTION_CONTRACT_ADAPTER.validate_python(response)
\ No newline at end of file
@@ -1,15 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, List, Type, TypeVar, Any
-from uuid import UUID
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, List, Tuple, Type, TypeVar, Any
+from uuid import UUID, uuid4
 
-from sqlalchemy import create_engine, Boolean, String, DateTime, Float, Integer, ForeignKey, Index, Numeric, UniqueConstraint, select, func
+from sqlalchemy import create_engine, event, inspect, make_url, Boolean, String, DateTime, Float, Integer, ForeignKey, Index, LargeBinary, Numeric, TypeDecorator, UniqueConstraint, bindparam, case, cast, insert, select, update, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, Session, relationship
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.engine import Row
 from sqlalchemy.sql import Select
 
 class Base(DeclarativeBase):
     pass
 
+class UUIDBytes(TypeDecorator):
+    """UUID stored as its 16 raw bytes instead of 32 hex characters, read back as a UUID"""
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if not isinstance(value, UUID):
+            value = UUID(str(value))
+        return value.bytes
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[UUID]:
+        return UUID(bytes=value) if value is not None else None
+
 class MarketData(Base):
     """Table for storing OHLCV market data"""
     __tablename__ = "market_data"
@@ -17,22 +36,24 @@ class MarketData(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     symbol: Mapped[str] = mapped_column(String)
     timestamp: Mapped[datetime] = mapped_column(DateTime)
-    open: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
-    high: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
-    low: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
-    close: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
+    open: Mapped[float] = mapped_column(Float)
+    high: Mapped[float] = mapped_column(Float)
+    low: Mapped[float] = mapped_column(Float)
+    close: Mapped[float] = mapped_column(Float)
     volume: Mapped[int] = mapped_column(Integer)
     timeframe: Mapped[str] = mapped_column(String)  # e.g., '1min', '5min', '1day'
     
     __table_args__ = (
-        Index('idx_market_data_lookup', 'symbol', 'timestamp', 'timeframe'),
+        # Serves "latest bars for (symbol, timeframe)" straight from the index, without a sort.
+        # close rides along so latest-price lookups never touch the table rows
+        Index('idx_market_data_lookup', 'symbol', 'timeframe', timestamp.desc(), 'close'),
         UniqueConstraint('symbol', 'timestamp', 'timeframe', name='unique_market_data')
     )
 
 class Order(Base):
     __tablename__ = "orders"
     
-    id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[UUID] = mapped_column(UUIDBytes, primary_key=True, default=uuid4)
     client_order_id: Mapped[str] = mapped_column(String, unique=True)
     created_at: Mapped[datetime] = mapped_column(DateTime)
     updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -55,12 +76,17 @@ class Order(Base):
     
     fills = relationship("OrderFill", back_populates="order")
 
+    __table_args__ = (
+        # The fill loop and get_open_orders filter on status every tick, then narrow by symbol
+        Index('idx_order_status_symbol', 'status', 'symbol'),
+    )
+
 class OrderFill(Base):
     """Table for tracking individual order fills"""
     __tablename__ = "order_fills"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    order_id: Mapped[str] = mapped_column(String, ForeignKey('orders.id'))
+    order_id: Mapped[UUID] = mapped_column(UUIDBytes, ForeignKey('orders.id'))
     timestamp: Mapped[datetime] = mapped_column(DateTime)
     price: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
     qty: Mapped[float] = mapped_column(Numeric(precision=10, scale=4))
@@ -70,25 +96,26 @@ class OrderFill(Base):
 class Position(Base):
     __tablename__ = "positions"
     
-    id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[UUID] = mapped_column(UUIDBytes, primary_key=True, default=uuid4)
     symbol: Mapped[str] = mapped_column(String, unique=True)
-    qty: Mapped[str] = mapped_column(String)
+    # Amounts are stored as numbers for the fill math and only formatted as strings for the API
+    qty: Mapped[float] = mapped_column(Float)  # always positive, the direction is in side
     side: Mapped[str] = mapped_column(String)  # long, short
-    avg_entry_price: Mapped[str] = mapped_column(String)
-    market_value: Mapped[str] = mapped_column(String)
-    cost_basis: Mapped[str] = mapped_column(String)
-    unrealized_pl: Mapped[str] = mapped_column(String)
-    unrealized_plpc: Mapped[str] = mapped_column(String)
-    current_price: Mapped[str] = mapped_column(String)
-    lastday_price: Mapped[str] = mapped_column(String)
-    change_today: Mapped[str] = mapped_column(String)
-    realized_pl: Mapped[str] = mapped_column(String, default="0")
-    realized_plpc: Mapped[str] = mapped_column(String, default="0")
+    avg_entry_price: Mapped[float] = mapped_column(Float)
+    market_value: Mapped[float] = mapped_column(Float)
+    cost_basis: Mapped[float] = mapped_column(Float)
+    unrealized_pl: Mapped[float] = mapped_column(Float)
+    unrealized_plpc: Mapped[float] = mapped_column(Float)
+    current_price: Mapped[float] = mapped_column(Float)
+    lastday_price: Mapped[float] = mapped_column(Float)
+    change_today: Mapped[float] = mapped_column(Float)
+    realized_pl: Mapped[float] = mapped_column(Float, default=0.0)
+    realized_plpc: Mapped[float] = mapped_column(Float, default=0.0)
 
 class Asset(Base):
     __tablename__ = "assets"
     
-    id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[UUID] = mapped_column(UUIDBytes, primary_key=True, default=uuid4)
     symbol: Mapped[str] = mapped_column(String, unique=True)
     name: Mapped[str] = mapped_column(String)
     exchange: Mapped[str] = mapped_column(String)
@@ -108,7 +135,7 @@ class Asset(Base):
 class Account(Base):
     __tablename__ = "account"
     
-    id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[UUID] = mapped_column(UUIDBytes, primary_key=True, default=uuid4)
     cash: Mapped[str] = mapped_column(String)
     buying_power: Mapped[str] = mapped_column(String)
     regt_buying_power: Mapped[str] = mapped_column(String, default="0")
@@ -129,145 +156,379 @@ class Account(Base):
 
 T = TypeVar('T', bound=Base)
 
+# Session of the Database.transaction() block the current task is running in, if any
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar("simulation_db_session", default=None)
+# Callbacks waiting for that block to commit
+_after_commit: ContextVar[Optional[List[Callable[[], Awaitable[None]]]]] = ContextVar(
+    "simulation_db_after_commit", default=None
+)
+
+# WAL lets reads run alongside the writer and only fsyncs at checkpoints
+_SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+# Stored in SQLite's user_version. Bump it whenever a table's columns, types or indexes change,
+# create_all only adds missing tables so older files would otherwise keep their old layout
+SCHEMA_VERSION = 1
+
+# Compiled statements kept per engine, SQLAlchemy's default is 500
+_QUERY_CACHE_SIZE = 1200
+
+def _parse_uuid(value: str) -> Optional[UUID]:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+# Hot lookups are built once and only take bound parameters per call.
+# Ids and symbols get separate statements so each lookup is one equality on one unique index
+_LATEST_PRICE_STMT = (
+    select(MarketData.close)
+    .where(MarketData.symbol == bindparam("symbol"))
+    .where(MarketData.timeframe == bindparam("timeframe"))
+    .order_by(MarketData.timestamp.desc())
+    .limit(1)
+)
+# Orders in these states can still fill or be canceled
+OPEN_ORDER_STATUSES = ['new', 'accepted', 'partially_filled']
+_OPEN_ORDERS_STMT = select(Order).where(Order.status.in_(OPEN_ORDER_STATUSES))
+_ORDER_BY_ID_STMT = select(*Order.__table__.columns).where(Order.id == bindparam("value"))
+_ORDER_BY_CLIENT_ID_STMT = select(*Order.__table__.columns).where(Order.client_order_id == bindparam("value"))
+_POSITION_BY_ID_STMT = select(Position).where(Position.id == bindparam("value"))
+_POSITION_BY_SYMBOL_STMT = select(Position).where(Position.symbol == bindparam("value"))
+_ASSET_BY_ID_STMT = select(Asset).where(Asset.id == bindparam("value"))
+_ASSET_BY_SYMBOL_STMT = select(Asset).where(Asset.symbol == bindparam("value"))
+_ACCOUNT_STMT = select(Account)
+
+def _fillable_orders_stmt() -> Select:
+    """Ids of the open orders their symbol's latest close would fill, with the price each fills at"""
+    latest_close = (
+        select(MarketData.close)
+        .where(MarketData.symbol == Order.symbol)
+        .where(MarketData.timeframe == bindparam("timeframe"))
+        .order_by(MarketData.timestamp.desc())
+        .limit(1)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    priced = (
+        select(Order.id.label("order_id"), latest_close.label("price"))
+        .where(Order.status.in_(OPEN_ORDER_STATUSES))
+        .subquery()
+    )
+    price = priced.c.price
+    limit_price = cast(Order.limit_price, Float)
+    stop_price = cast(Order.stop_price, Float)
+    buy = Order.side == "buy"
+    sell = Order.side == "sell"
+    # NULL means the order stays open this tick
+    fill_price = case(
+        (Order.type == "market", price),
+        ((Order.type == "limit") & ((buy & (price <= limit_price)) | (sell & (price >= limit_price))), limit_price),
+        ((Order.type == "stop") & ((sell & (price <= stop_price)) | (buy & (price >= stop_price))), price),
+        else_=None,
+    ).label("fill_price")
+    return (
+        select(Order.id.label("order_id"), fill_price)
+        .join(priced, Order.id == priced.c.order_id)
+        .where(price > 0)
+        .where(fill_price.is_not(None))
+    )
+
+def _fill_orders_stmt():
+    """Mark every fillable order filled in one UPDATE ... FROM, returning what the fill rows need"""
+    fills = _fillable_orders_stmt().subquery("fills")
+    return (
+        update(Order)
+        .where(Order.id == fills.c.order_id)
+        .values(
+            status="filled",
+            filled_at=bindparam("now", type_=DateTime),
+            filled_qty=Order.qty,
+            filled_avg_price=cast(fills.c.fill_price, String),
+        )
+        .returning(Order.id, Order.symbol, Order.side, Order.qty, Order.filled_avg_price)
+        .execution_options(synchronize_session=False)
+    )
+
+_FILL_ORDERS_STMT = _fill_orders_stmt()
+
 class Database:
     def __init__(self, db_url: str = "sqlite+aiosqlite:///simulation_trading.db"):
-        self.engine = create_async_engine(db_url, echo=False)
-        self.async_session = async_sessionmaker(self.engine, class_=AsyncSession)
+        # The statement shapes are few and fixed, a larger compiled cache keeps all of them warm
+        self.engine = create_async_engine(db_url, echo=False, query_cache_size=_QUERY_CACHE_SIZE)
+        self._sync_engine = None
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", _set_sqlite_pragmas)
+            # Bulk writes go through a plain sqlite3 engine on the same file from a worker thread,
+            # an in-memory database is private to its connection so it keeps the async path
+            url = make_url(db_url)
+            if url.database not in (None, "", ":memory:"):
+                self._sync_engine = create_engine(
+                    url.set(drivername="sqlite"), echo=False, query_cache_size=_QUERY_CACHE_SIZE
+                )
+                event.listen(self._sync_engine, "connect", _set_sqlite_pragmas)
+        # Rows are read after commit to build the API models, so keep their loaded state
+        self.async_session = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
 
     async def initialize(self):
-        """Create all tables"""
+        """Create all tables, refusing a SQLite file written with a different schema version"""
         async with self.engine.begin() as conn:
+            if self.engine.dialect.name != "sqlite":
+                await conn.run_sync(Base.metadata.create_all)
+                return
+
+            version = (await conn.exec_driver_sql("PRAGMA user_version")).scalar()
+            if version != SCHEMA_VERSION:
+                # Version 0 is either a new file or one from before versioning, its tables tell them apart
+                tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+                if version != 0 or tables:
+                    raise RuntimeError(
+                        f"Simulation database {self.engine.url.database} has schema version {version}, "
+                        f"this version of the simulation needs {SCHEMA_VERSION}. Its tables can't be "
+                        "upgraded in place, move or delete the file to start a new simulation."
+                    )
             await conn.run_sync(Base.metadata.create_all)
+            await conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     async def get_session(self) -> AsyncSession:
         """Get a database session"""
         return self.async_session()
 
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        """Share one session across several writes, committing once when the block exits"""
+        async with self.async_session() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """
+        Run every Database call inside the block on one session and commit once when it exits.
+        A nested transaction() joins the outer one instead of opening a second session.
+        """
+        session = _current_session.get()
+        if session is not None:
+            yield session
+            return
+
+        callbacks = []
+        async with self.session_scope() as session:
+            token = _current_session.set(session)
+            callbacks_token = _after_commit.set(callbacks)
+            try:
+                yield session
+            finally:
+                _after_commit.reset(callbacks_token)
+                _current_session.reset(token)
+
+        # Committed, a rolled back block never gets here
+        for callback in callbacks:
+            await callback()
+
+    async def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Run callback once the surrounding transaction() commits, or straight away outside of one.
+        A callback already waiting on the same transaction is not queued twice.
+        """
+        callbacks = _after_commit.get()
+        if callbacks is None:
+            await callback()
+        elif callback not in callbacks:
+            callbacks.append(callback)
+
+    @asynccontextmanager
+    async def _use_session(self, session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        """Reuse the caller's or the surrounding transaction's session, otherwise open a short-lived one"""
+        if session is None:
+            session = _current_session.get()
+        if session is not None:
+            yield session
+        else:
+            async with self.async_session() as session:
+                yield session
+
+    def in_transaction(self) -> bool:
+        """Whether the current task runs inside a transaction() block, all calls then share its session"""
+        return _current_session.get() is not None
+
+    def _owns_session(self, session: Optional[AsyncSession]) -> bool:
+        """Whether a helper called with this session opened its own, and so has to commit it"""
+        return session is None and _current_session.get() is None
+
     async def close(self):
         """Close database connection"""
         await self.engine.dispose()
+        if self._sync_engine is not None:
+            self._sync_engine.dispose()
 
-    async def add(self, obj: Base) -> None:
-        """Add a single object to the database"""
-        async with self.async_session() as session:
-            session.add(obj)
-            await session.commit()
+    async def add(self, obj: Base, session: Optional[AsyncSession] = None) -> None:
+        """Add a single object to the database, a shared session is left for its owner to commit"""
+        async with self._use_session(session) as s:
+            s.add(obj)
+            if self._owns_session(session):
+                await s.commit()
 
-    async def add_all(self, objects: List[Base]) -> None:
-        """Add multiple objects to the database"""
-        async with self.async_session() as session:
-            session.add_all(objects)
-            await session.commit()
+    async def add_all(self, objects: List[Base], session: Optional[AsyncSession] = None) -> None:
+        """Add multiple objects to the database, a shared session is left for its owner to commit"""
+        async with self._use_session(session) as s:
+            s.add_all(objects)
+            if self._owns_session(session):
+                await s.commit()
 
-    async def get(self, model: Type[T], id: Any) -> Optional[T]:
+    async def get(self, model: Type[T], id: Any, session: Optional[AsyncSession] = None) -> Optional[T]:
         """Get a single object by its primary key"""
-        async with self.async_session() as session:
+        async with self._use_session(session) as session:
             stmt = select(model).where(model.id == id)
             result = await session.execute(stmt)
             return result.scalar_one_or_none()
 
-    async def get_all(self, model: Type[T]) -> List[T]:
+    async def get_all(self, model: Type[T], session: Optional[AsyncSession] = None) -> List[T]:
         """Get all objects of a given model"""
-        async with self.async_session() as session:
+        async with self._use_session(session) as session:
             stmt = select(model)
             result = await session.execute(stmt)
             return list(result.scalars().all())
 
-    async def execute(self, stmt: Select) -> Any:
+    async def execute(self, stmt: Select, session: Optional[AsyncSession] = None) -> Any:
         """Execute a custom select statement"""
-        async with self.async_session() as session:
+        async with self._use_session(session) as session:
             result = await session.execute(stmt)
             return result
 
-    async def delete(self, obj: Base) -> None:
-        """Delete an object from the database"""
-        async with self.async_session() as session:
-            await session.delete(obj)
-            await session.commit()
+    async def delete(self, obj: Base, session: Optional[AsyncSession] = None) -> None:
+        """Delete an object from the database, a shared session is left for its owner to commit"""
+        async with self._use_session(session) as s:
+            await s.delete(obj)
+            if self._owns_session(session):
+                await s.commit()
 
-    async def update(self, obj: Base, **kwargs) -> None:
-        """Update an object with given attributes"""
-        async with self.async_session() as session:
+    async def update(self, obj: Base, session: Optional[AsyncSession] = None, **kwargs) -> None:
+        """Update an object with given attributes, a shared session is left for its owner to commit"""
+        async with self._use_session(session) as s:
             for key, value in kwargs.items():
                 setattr(obj, key, value)
-            session.add(obj)
-            await session.commit()
+            s.add(obj)
+            if self._owns_session(session):
+                await s.commit()
 
     # Market Data specific methods
-    async def get_latest_price(self, symbol: str, timeframe: str = "1min") -> Optional[float]:
+    async def bulk_insert_market_data(
+        self, records: List[Dict[str, Any]], session: Optional[AsyncSession] = None
+    ) -> None:
+        """Insert market data rows with one executemany, skipping bars that are already stored"""
+        if not records:
+            return
+        stmt = insert(MarketData).prefix_with("OR IGNORE", dialect="sqlite")
+        if self._sync_engine is not None and self._owns_session(session):
+            # aiosqlite hops threads once per cursor call, the sync engine does the whole batch in one hop
+            await asyncio.to_thread(self._bulk_insert_sync, stmt, records)
+        else:
+            async with self._use_session(session) as s:
+                await s.execute(stmt, records)
+                if self._owns_session(session):
+                    await s.commit()
+
+    def _bulk_insert_sync(self, stmt, records: List[Dict[str, Any]]) -> None:
+        with self._sync_engine.begin() as conn:
+            conn.execute(stmt, records)
+
+    async def get_latest_price(
+        self, symbol: str, timeframe: str = "1min", session: Optional[AsyncSession] = None
+    ) -> Optional[float]:
         """Get the latest price for a symbol"""
-        async with self.async_session() as session:
-            stmt = (
-                select(MarketData)
-                .where(MarketData.symbol == symbol)
-                .where(MarketData.timeframe == timeframe)
-                .order_by(MarketData.timestamp.desc())
-                .limit(1)
-            )
-            result = await session.execute(stmt)
-            market_data = result.scalar_one_or_none()
-            return float(market_data.close) if market_data else None
-
-    async def get_bars(
-        self, 
-        symbol: str, 
-        timeframe: str = "1min",
-        start: Optional[datetime] = None,
-        end: Optional[datetime] = None,
-        limit: Optional[int] = None
-    ) -> List[MarketData]:
-        """Get historical bars for a symbol"""
-        async with self.async_session() as session:
-            stmt = select(MarketData).where(
-                MarketData.symbol == symbol,
-                MarketData.timeframe == timeframe
-            )
-            
-            if start:
-                stmt = stmt.where(MarketData.timestamp >= start)
-            if end:
-                stmt = stmt.where(MarketData.timestamp <= end)
-                
-            stmt = stmt.order_by(MarketData.timestamp.desc())
-            
-            if limit:
-                stmt = stmt.limit(limit)
-                
-            result = await session.execute(stmt)
-            return list(result.scalars().all())
+        async with self._use_session(session) as session:
+            result = await session.execute(_LATEST_PRICE_STMT, {"symbol": symbol, "timeframe": timeframe})
+            close = result.scalar_one_or_none()
+            return float(close) if close is not None else None
 
     # Order specific methods
-    async def get_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+    async def get_open_orders(
+        self, symbol: Optional[str] = None, session: Optional[AsyncSession] = None
+    ) -> List[Order]:
         """Get all open orders, optionally filtered by symbol"""
-        async with self.async_session() as session:
-            stmt = select(Order).where(
-                Order.status.in_(['new', 'accepted', 'partially_filled'])
-            )
+        async with self._use_session(session) as session:
+            stmt = _OPEN_ORDERS_STMT
             if symbol:
                 stmt = stmt.where(Order.symbol == symbol)
             result = await session.execute(stmt)
             return list(result.scalars().all())
 
+    async def fill_orders(
+        self, now: datetime, timeframe: str = "1min", session: Optional[AsyncSession] = None
+    ) -> List[Row]:
+        """
+        Fill every open order the latest market data reaches, entirely in the database.
+        Returns (id, symbol, side, qty, filled_avg_price) of the filled orders, a shared session is
+        left for its owner to commit.
+        """
+        async with self._use_session(session) as s:
+            result = await s.execute(_FILL_ORDERS_STMT, {"now": now, "timeframe": timeframe})
+            filled = list(result.all())
+            if self._owns_session(session):
+                await s.commit()
+            return filled
+
+    async def get_order_values(
+        self, order_id: UUID, session: Optional[AsyncSession] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get the column values of an order by id, without loading an ORM object"""
+        async with self._use_session(session) as session:
+            result = await session.execute(_ORDER_BY_ID_STMT, {"value": order_id})
+            row = result.mappings().one_or_none()
+            return dict(row) if row is not None else None
+
+    async def get_order_values_by_client_id(
+        self, client_order_id: str, session: Optional[AsyncSession] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get the column values of an order by client order id, without loading an ORM object"""
+        async with self._use_session(session) as session:
+            result = await session.execute(_ORDER_BY_CLIENT_ID_STMT, {"value": client_order_id})
+            row = result.mappings().one_or_none()
+            return dict(row) if row is not None else None
+
     # Position specific methods
-    async def get_position(self, symbol: str) -> Optional[Position]:
-        """Get position for a symbol"""
-        async with self.async_session() as session:
-            stmt = select(Position).where(Position.symbol == symbol)
-            result = await session.execute(stmt)
+
+    async def get_position(self, symbol_or_id: str, session: Optional[AsyncSession] = None) -> Optional[Position]:
+        """Get position by symbol or position id"""
+        async with self._use_session(session) as session:
+            row_id = _parse_uuid(symbol_or_id)
+            if row_id is not None:
+                result = await session.execute(_POSITION_BY_ID_STMT, {"value": row_id})
+            else:
+                result = await session.execute(_POSITION_BY_SYMBOL_STMT, {"value": symbol_or_id})
             return result.scalar_one_or_none()
 
     # Account specific methods
-    async def get_account(self) -> Optional[Account]:
+    async def get_account(self, session: Optional[AsyncSession] = None) -> Optional[Account]:
         """Get the trading account"""
-        async with self.async_session() as session:
-            stmt = select(Account)
-            result = await session.execute(stmt)
+        async with self._use_session(session) as session:
+            result = await session.execute(_ACCOUNT_STMT)
             return result.scalar_one_or_none()
 
     # Asset specific methods
-    async def get_asset(self, symbol: str) -> Optional[Asset]:
-        """Get asset information by symbol"""
-        async with self.async_session() as session:
-            stmt = select(Asset).where(Asset.symbol == symbol)
-            result = await session.execute(stmt)
+    async def get_asset(self, symbol_or_id: str, session: Optional[AsyncSession] = None) -> Optional[Asset]:
+        """Get asset information by symbol or asset id"""
+        async with self._use_session(session) as session:
+            row_id = _parse_uuid(symbol_or_id)
+            if row_id is not None:
+                result = await session.execute(_ASSET_BY_ID_STMT, {"value": row_id})
+            else:
+                result = await session.execute(_ASSET_BY_SYMBOL_STMT, {"value": symbol_or_id})
             return result.scalar_one_or_none()
@@ -1,13 +1,19 @@
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, List, Union, Dict, Any
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, List, Tuple, Type, TypeVar, Union, Dict, Any, get_args
 from uuid import UUID, uuid4
-import json
+import orjson
 import asyncio
 import yfinance as yf
 import pandas as pd
 
-from sqlalchemy.sql import select
+from sqlalchemy import Float
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import delete, insert, select, update
 from alpaca.common import RawData
+from alpaca.trading.enums import AssetClass, AssetExchange, OrderClass
 from alpaca.trading.models import (
     Order as AlpacaOrder, Position as AlpacaPosition, 
     ClosePositionResponse, Asset as AlpacaAsset,
@@ -20,7 +26,19 @@ from alpaca.trading.requests import (
     GetAssetsRequest, GetPortfolioHistoryRequest
 )
 
-from .db import Database, Order, Position, Asset, Account, MarketData, OrderFill
+from pydantic import BaseModel
+
+from .db import OPEN_ORDER_STATUSES, Database, Order, Position, Asset, Account, OrderFill
+
+M = TypeVar("M", bound=BaseModel)
+
+DEFAULT_ACCOUNT_CONFIGURATION = {
+    "dtbp_check": "both",
+    "no_shorting": False,
+    "suspend_trade": False,
+    "trade_confirm_email": "all",
+    "trade_suspended_by_user": False
+}
 
 DEFAULT_ASSETS = [
     {
@@ -50,6 +68,124 @@ DEFAULT_ASSETS = [
     # Add more default assets as needed
 ]
 
+# Concurrent ticker requests per yfinance download, more than this trips its rate limiting
+_DOWNLOAD_THREADS = 8
+
+# Longest the fill loop sleeps without being woken, picks up orders written outside this client
+_FILL_CHECK_TIMEOUT = 60.0
+
+# Most positions kept in the read cache, least recently used ones are dropped first
+_POSITION_CACHE_SIZE = 256
+
+# Column names of each table, rows are converted from these instead of __dict__
+_ORDER_COLS = tuple(column.name for column in Order.__table__.columns)
+_POSITION_COLS = tuple(column.name for column in Position.__table__.columns)
+_ASSET_COLS = tuple(column.name for column in Asset.__table__.columns)
+_ACCOUNT_COLS = tuple(column.name for column in Account.__table__.columns)
+_POSITION_NUMERIC_COLS = frozenset(
+    column.name for column in Position.__table__.columns if isinstance(column.type, Float)
+)
+
+
+def _row_dict(row: Any, columns: Tuple[str, ...]) -> Dict[str, Any]:
+    """Column values of a row, without the instance state or any relationship"""
+    return {name: getattr(row, name) for name in columns}
+
+
+def _position_dict(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Position column values as the API reports them, with the stored numbers as strings"""
+    return {
+        name: str(value) if value is not None and name in _POSITION_NUMERIC_COLS else value
+        for name, value in values.items()
+    }
+
+
+def _mapping_dicts(result: Any) -> List[Dict[str, Any]]:
+    """Rows of a plain column select as dicts keyed by column name"""
+    return [dict(row) for row in result.mappings()]
+
+
+def _model_values(model: Type[BaseModel], values: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored column values plus the fields the Alpaca model requires that the tables don't keep"""
+    values = dict(values)
+    if model is AlpacaOrder:
+        values.setdefault("order_class", OrderClass.SIMPLE)
+        values.setdefault("extended_hours", False)
+        # Unset timestamps fall back to creation, the model requires them
+        if values.get("submitted_at") is None:
+            values["submitted_at"] = values["created_at"]
+        if values.get("updated_at") is None:
+            values["updated_at"] = values["submitted_at"]
+        # Legs are stored as a JSON list of ids, the model expects full leg orders
+        values["legs"] = None
+    elif model is AlpacaPosition:
+        # Positions are not linked to assets, they are identified by their own id
+        values.setdefault("asset_id", values["id"])
+        values.setdefault("exchange", AssetExchange.EMPTY)
+        values.setdefault("asset_class", AssetClass.US_EQUITY)
+    elif model is TradeAccount:
+        values.setdefault("account_number", "SIMULATION")
+    return values
+
+
+@lru_cache(maxsize=None)
+def _enum_fields(model: Type[BaseModel]) -> Dict[str, Type[Enum]]:
+    """Fields of a model typed as an enum, or an optional enum, with that enum"""
+    fields = {}
+    for name, field in model.model_fields.items():
+        for annotation in (field.annotation, *get_args(field.annotation)):
+            if isinstance(annotation, type) and issubclass(annotation, Enum):
+                fields[name] = annotation
+                break
+    return fields
+
+
+@lru_cache(maxsize=None)
+def _field_aliases(model: Type[BaseModel]) -> Dict[str, str]:
+    """Fields of a model with an alias, like Asset.asset_class read from "class", with that alias"""
+    return {
+        name: field.alias
+        for name, field in model.model_fields.items()
+        if field.alias is not None and field.alias != name
+    }
+
+
+def _download_history(symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Fetch today's 1 minute bars for all symbols with one batched yfinance download"""
+    # yfinance fetches the tickers on its own thread pool, sized here
+    data = yf.download(
+        symbols,
+        period="1d",
+        interval="1m",
+        group_by="ticker",
+        threads=min(len(symbols), _DOWNLOAD_THREADS),
+        progress=False,
+    )
+    if data is None or data.empty:
+        return {}
+
+    history = {}
+    downloaded = set(data.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in downloaded:
+            continue
+        hist = data[symbol].dropna()
+        if not hist.empty:
+            history[symbol] = hist
+    return history
+
+
+def _market_data_records(symbol: str, hist: pd.DataFrame, timeframe: str = "1min") -> List[Dict[str, Any]]:
+    """Turn a yfinance history frame into MarketData rows, converting whole columns at once"""
+    hist = hist.rename(columns=str.lower)
+    hist.index = hist.index.rename("timestamp")
+    return (
+        hist.reset_index()[["timestamp", "open", "high", "low", "close", "volume"]]
+        .astype({"volume": "int64"})
+        .assign(symbol=symbol, timeframe=timeframe)
+        .to_dict("records")
+    )
+
 class SimulationTradingClient:
     def __init__(
         self,
@@ -60,7 +196,8 @@ class SimulationTradingClient:
         raw_data: bool = False,
         url_override: Optional[str] = None,
         db_path: str = "sqlite+aiosqlite:///simulation_trading.db",
-        initial_cash: float = 100000.0
+        initial_cash: float = 100000.0,
+        validate_models: bool = True
     ) -> None:
         """
         Initializes a simulated trading client that mirrors the real Alpaca trading client
@@ -69,12 +206,68 @@ class SimulationTradingClient:
         Args:
             db_path (str): SQLAlchemy database URL
             initial_cash (float): Initial cash balance for the account
+            validate_models (bool): Run pydantic validation when wrapping stored rows in Alpaca models.
+              Validation turns the stored strings into the models' enums and fills their defaults. Without it
+              rows are wrapped with model_construct, which is faster but leaves enum fields as plain strings.
         """
         self._use_raw_data = raw_data
+        self._validate_models = validate_models
         self.db = Database(db_path)
         self._order_update_task = None
         self._market_data_update_task = None
         self._initial_cash = str(initial_cash)
+        # Static response, built on first use and reused after that
+        self._account_configuration: Optional[AccountConfiguration] = None
+        # Column values of hot rows, cleared after every commit that changes them
+        self._position_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Bumped on every invalidation, reads that started before one don't fill the cache
+        self._position_cache_generation = 0
+        self._account_cache: Optional[Dict[str, Any]] = None
+        # The fill loop sleeps on this until new prices or orders arrive, each wake-up bumps the version
+        self._fill_check = asyncio.Condition()
+        self._fill_check_version = 0
+
+    def transaction(self):
+        """
+        Groups several client calls into one database transaction, committed when the block exits.
+
+        Usage:
+            async with client.transaction():
+                await client.cancel_orders()
+                await client.close_position("AAPL")
+        """
+        return self.db.transaction()
+
+    def _to_model(self, model: Type[M], values: Dict[str, Any]) -> M:
+        """Wrap a stored row's column values in its Alpaca model"""
+        values = _model_values(model, values)
+        if not self._validate_models:
+            # model_construct takes values as they are, so turn the stored strings into the model's enums
+            for name, enum in _enum_fields(model).items():
+                value = values.get(name)
+                if value is not None and not isinstance(value, enum):
+                    values[name] = enum(value)
+        # Columns are named after the fields, the models only accept aliased fields by their alias
+        for name, alias in _field_aliases(model).items():
+            if name in values:
+                values[alias] = values.pop(name)
+        if self._validate_models:
+            return model(**values)
+        return model.model_construct(**values)
+
+    async def _gather_reads(self, *reads) -> List[Any]:
+        """
+        Run independent reads side by side on their own sessions. Inside a transaction() block every
+        task shares the block's session, which can't run two statements at once, so they run in turn.
+        """
+        if self.db.in_transaction():
+            return [await read for read in reads]
+        return await asyncio.gather(*reads)
+
+    def _invalidate_position_cache(self) -> None:
+        """Drop cached positions after a write to them, committed or failed"""
+        self._position_cache.clear()
+        self._position_cache_generation += 1
 
     async def _initialize_db(self):
         """Initialize database with default data"""
@@ -82,12 +275,12 @@ class SimulationTradingClient:
             # Create tables
             await self.db.initialize()
             
-            # Check if we need to initialize default data
-            account = await self.db.get_account()
+            # Check if we need to initialize default data, both lookups run side by side when they can
+            now = datetime.now()
+            account, assets = await self._gather_reads(self.db.get_account(), self.db.get_all(Asset))
             if not account:
                 # Create default account
                 account = Account(
-                    id=str(uuid4()),
                     cash=self._initial_cash,
                     buying_power=self._initial_cash,
                     regt_buying_power=self._initial_cash,
@@ -99,48 +292,37 @@ class SimulationTradingClient:
                     trading_blocked=False,
                     transfers_blocked=False,
                     account_blocked=False,
-                    created_at=datetime.now(),
+                    created_at=now,
                     status="ACTIVE",
                     last_equity=self._initial_cash,
                     last_maintenance_margin="0",
                     last_initial_margin="0",
-                    last_updated=datetime.now()
+                    last_updated=now
                 )
                 await self.db.add(account)
             
             # Initialize default assets if none exist
-            assets = await self.db.get_all(Asset)
             if not assets:
                 for asset_data in DEFAULT_ASSETS:
                     asset = Asset(
-                        id=str(uuid4()),
-                        last_updated=datetime.now(),
+                        last_updated=now,
                         **asset_data
                     )
                     await self.db.add(asset)
                 
                 # Initialize market data for default assets
-                for asset_data in DEFAULT_ASSETS:
-                    symbol = asset_data["symbol"]
-                    try:
-                        ticker = yf.Ticker(symbol)
-                        hist = ticker.history(period="1d", interval="1m")
-                        if not hist.empty:
-                            market_data = []
-                            for timestamp, row in hist.iterrows():
-                                market_data.append(MarketData(
-                                    symbol=symbol,
-                                    timestamp=timestamp.to_pydatetime(),
-                                    open=float(row['Open']),
-                                    high=float(row['High']),
-                                    low=float(row['Low']),
-                                    close=float(row['Close']),
-                                    volume=int(row['Volume']),
-                                    timeframe="1min"
-                                ))
-                            await self.db.add_all(market_data)
-                    except Exception as e:
-                        print(f"Error initializing market data for {symbol}: {e}")
+                try:
+                    histories = await asyncio.to_thread(
+                        _download_history, [asset_data["symbol"] for asset_data in DEFAULT_ASSETS]
+                    )
+                    records = [
+                        record
+                        for symbol, hist in histories.items()
+                        for record in _market_data_records(symbol, hist)
+                    ]
+                    await self.db.bulk_insert_market_data(records)
+                except Exception as e:
+                    print(f"Error initializing market data: {e}")
 
         except Exception as e:
             print(f"Error initializing database: {e}")
@@ -162,45 +344,35 @@ class SimulationTradingClient:
             self._market_data_update_task.cancel()
         await self.db.close()
 
+    async def _notify_fill_check(self) -> None:
+        """Wake the fill loop, new prices or orders may fill something"""
+        async with self._fill_check:
+            self._fill_check_version += 1
+            self._fill_check.notify_all()
+
     async def _update_market_data(self):
         """Background task to update market data using yfinance"""
         while True:
             try:
-                # Get all unique symbols from orders and positions
-                symbols = set()
-                async with self.db.async_session() as session:
-                    # Get symbols from orders
-                    stmt = select(Order.symbol).distinct()
-                    result = await session.execute(stmt)
-                    symbols.update(row[0] for row in result)
-                    
-                    # Get symbols from positions
-                    stmt = select(Position.symbol).distinct()
-                    result = await session.execute(stmt)
-                    symbols.update(row[0] for row in result)
-
-                for symbol in symbols:
-                    # Get latest data from yfinance
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="1d", interval="1m")
-                    if hist.empty:
-                        continue
-
-                    # Convert to MarketData objects
-                    market_data = []
-                    for timestamp, row in hist.iterrows():
-                        market_data.append(MarketData(
-                            symbol=symbol,
-                            timestamp=timestamp.to_pydatetime(),
-                            open=float(row['Open']),
-                            high=float(row['High']),
-                            low=float(row['Low']),
-                            close=float(row['Close']),
-                            volume=int(row['Volume']),
-                            timeframe="1min"
-                        ))
-                    
-                    await self.db.add_all(market_data)
+                # Get all unique symbols from orders and positions, each query on its own session when it can
+                order_symbols, position_symbols = await self._gather_reads(
+                    self.db.execute(select(Order.symbol).distinct()),
+                    self.db.execute(select(Position.symbol).distinct()),
+                )
+                symbols = {row[0] for row in order_symbols} | {row[0] for row in position_symbols}
+
+                # Get latest data from yfinance, one request for all symbols
+                histories = await asyncio.to_thread(_download_history, sorted(symbols)) if symbols else {}
+
+                # All symbols of this cycle go in with one executemany and one commit
+                records = [
+                    record
+                    for symbol, hist in histories.items()
+                    for record in _market_data_records(symbol, hist)
+                ]
+                await self.db.bulk_insert_market_data(records)
+                if records:
+                    await self._notify_fill_check()
 
             except Exception as e:
                 print(f"Error updating market data: {e}")
@@ -209,182 +381,188 @@ class SimulationTradingClient:
 
     async def _update_orders(self):
         """Background task to update order status based on market data"""
+        seen = -1
         while True:
-            try:
-                # Get all open orders
-                open_orders = await self.db.get_open_orders()
-                
-                for order in open_orders:
-                    # Get latest price
-                    latest_price = await self.db.get_latest_price(order.symbol)
-                    if not latest_price:
-                        continue
-
-                    # Check if order should be filled
-                    should_fill = False
-                    fill_price = latest_price
-
-                    if order.type == "market":
-                        should_fill = True
-                    elif order.type == "limit":
-                        if order.side == "buy" and float(latest_price) <= float(order.limit_price):
-                            should_fill = True
-                            fill_price = float(order.limit_price)
-                        elif order.side == "sell" and float(latest_price) >= float(order.limit_price):
-                            should_fill = True
-                            fill_price = float(order.limit_price)
-                    elif order.type == "stop":
-                        if order.side == "sell" and float(latest_price) <= float(order.stop_price):
-                            should_fill = True
-                        elif order.side == "buy" and float(latest_price) >= float(order.stop_price):
-                            should_fill = True
-
-                    if should_fill:
-                        # Create order fill
-                        fill = OrderFill(
-                            order_id=order.id,
-                            timestamp=datetime.now(),
-                            price=fill_price,
-                            qty=float(order.qty)
-                        )
-                        
-                        # Update order
-                        await self.db.update(order,
-                            status="filled",
-                            filled_at=datetime.now(),
-                            filled_qty=order.qty,
-                            filled_avg_price=str(fill_price)
-                        )
-                        
-                        # Add fill
-                        await self.db.add(fill)
-                        
-                        # Update position
-                        await self._update_position(order, fill_price)
+            # Sleep until prices or orders change, the first pass runs straight away
+            async with self._fill_check:
+                try:
+                    await asyncio.wait_for(
+                        self._fill_check.wait_for(lambda: self._fill_check_version != seen),
+                        _FILL_CHECK_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                seen = self._fill_check_version
 
+            try:
+                await self._fill_open_orders()
             except Exception as e:
+                # The commit may have failed after positions were touched, don't trust the cache
+                self._invalidate_position_cache()
                 print(f"Error updating orders: {e}")
-            
-            await asyncio.sleep(1)  # Check every second
 
-    async def _update_position(self, order: Order, fill_price: float):
-        """Update position after order fill"""
-        position = await self.db.get_position(order.symbol)
-        qty = float(order.qty)
+    async def _fill_open_orders(self) -> None:
+        """Fill every open order the latest prices allow, one pass of the fill loop"""
+        # All fills of this tick are written in a single transaction and share its timestamp.
+        # The database picks the orders, prices them and marks them filled in one statement
+        now = datetime.now()
+        async with self.db.session_scope() as session:
+            filled = await self.db.fill_orders(now, session=session)
+            fills = []
+            for order in filled:
+                qty = float(order.qty)
+                fill_price = float(order.filled_avg_price)
+                fills.append({
+                    "order_id": order.id,
+                    "timestamp": now,
+                    "price": fill_price,
+                    "qty": qty,
+                })
+
+                # Update position
+                await self._update_position(session, order.symbol, order.side, qty, fill_price)
+
+            if fills:
+                await session.execute(insert(OrderFill), fills)
+
+        if filled:
+            self._invalidate_position_cache()
+
+    async def _update_position(self, session: AsyncSession, symbol: str, side: str, qty: float, fill_price: float):
+        """Update position after order fill, as part of the caller's transaction"""
+        result = await session.execute(select(Position).where(Position.symbol == symbol))
+        position = result.scalar_one_or_none()
         
-        if order.side == "sell":
+        if side == "sell":
             qty = -qty
             
         if position:
-            # Update existing position
-            new_qty = float(position.qty) + qty
+            # Update existing position, short positions store a positive qty
+            position_qty = position.qty if position.side == "long" else -position.qty
+            new_qty = position_qty + qty
             if new_qty == 0:
                 # Position closed
-                await self.db.delete(position)
+                await session.delete(position)
             else:
                 # Update position
-                avg_price = (float(position.avg_entry_price) * float(position.qty) + fill_price * qty) / new_qty
-                await self.db.update(position,
-                    qty=str(abs(new_qty)),
-                    side="long" if new_qty > 0 else "short",
-                    avg_entry_price=str(avg_price),
-                    market_value=str(new_qty * fill_price),
-                    current_price=str(fill_price)
-                )
+                position.avg_entry_price = (position.avg_entry_price * position_qty + fill_price * qty) / new_qty
+                position.qty = abs(new_qty)
+                position.side = "long" if new_qty > 0 else "short"
+                position.market_value = new_qty * fill_price
+                position.current_price = fill_price
         else:
             # Create new position
             position = Position(
-                id=str(uuid4()),
-                symbol=order.symbol,
-                qty=str(abs(qty)),
+                symbol=symbol,
+                qty=abs(qty),
                 side="long" if qty > 0 else "short",
-                avg_entry_price=str(fill_price),
-                market_value=str(qty * fill_price),
-                cost_basis=str(qty * fill_price),
-                unrealized_pl="0",
-                unrealized_plpc="0",
-                current_price=str(fill_price),
-                lastday_price=str(fill_price),
-                change_today="0",
-                realized_pl="0",
-                realized_plpc="0"
+                avg_entry_price=fill_price,
+                market_value=qty * fill_price,
+                cost_basis=qty * fill_price,
+                unrealized_pl=0.0,
+                unrealized_plpc=0.0,
+                current_price=fill_price,
+                lastday_price=fill_price,
+                change_today=0.0,
+                realized_pl=0.0,
+                realized_plpc=0.0
             )
-            await self.db.add(position)
+            session.add(position)
 
     async def submit_order(self, order_data: OrderRequest) -> Union[AlpacaOrder, RawData]:
         """Creates a simulated order with optional take profit and stop loss orders"""
-        order_id = str(uuid4())
         now = datetime.now()
+        qty = str(order_data.qty)
+        exit_side = "sell" if order_data.side == "buy" else "buy"
+        
+        # Only some request types carry these, read each one once
+        limit_price = getattr(order_data, "limit_price", None)
+        stop_price = getattr(order_data, "stop_price", None)
+        take_profit_price = getattr(order_data, "take_profit_price", None)
+        stop_loss_price = getattr(order_data, "stop_loss_price", None)
         
         # Create main order
         order = Order(
-            id=order_id,
             client_order_id=str(uuid4()),
             created_at=now,
             submitted_at=now,
             symbol=order_data.symbol,
-            qty=str(order_data.qty),
+            qty=qty,
             side=order_data.side,
             type=order_data.type,
             time_in_force=order_data.time_in_force,
-            limit_price=str(order_data.limit_price) if order_data.limit_price else None,
-            stop_price=str(order_data.stop_price) if order_data.stop_price else None,
+            limit_price=str(limit_price) if limit_price else None,
+            stop_price=str(stop_price) if stop_price else None,
             status="new"
         )
         
         leg_orders = []
         
         # Create take profit order if specified
-        if hasattr(order_data, 'take_profit_price') and order_data.take_profit_price:
+        if take_profit_price:
             tp_order = Order(
-                id=str(uuid4()),
+                id=uuid4(),
                 client_order_id=str(uuid4()),
                 created_at=now,
                 symbol=order_data.symbol,
-                qty=str(order_data.qty),
-                side="sell" if order_data.side == "buy" else "buy",
+                qty=qty,
+                side=exit_side,
                 type="limit",
                 time_in_force="gtc",
-                limit_price=str(order_data.take_profit_price),
+                limit_price=str(take_profit_price),
                 status="held"
             )
             leg_orders.append(tp_order)
         
         # Create stop loss order if specified
-        if hasattr(order_data, 'stop_loss_price') and order_data.stop_loss_price:
+        if stop_loss_price:
             sl_order = Order(
-                id=str(uuid4()),
+                id=uuid4(),
                 client_order_id=str(uuid4()),
                 created_at=now,
                 symbol=order_data.symbol,
-                qty=str(order_data.qty),
-                side="sell" if order_data.side == "buy" else "buy",
+                qty=qty,
+                side=exit_side,
                 type="stop",
                 time_in_force="gtc",
-                stop_price=str(order_data.stop_loss_price),
+                stop_price=str(stop_loss_price),
                 status="held"
             )
             leg_orders.append(sl_order)
         
         # Add leg order references to main order
         if leg_orders:
-            order.legs = json.dumps([leg.id for leg in leg_orders])
+            order.legs = orjson.dumps([str(leg.id) for leg in leg_orders]).decode()
             
-        # Add orders to database
-        await self.db.add(order)
-        for leg_order in leg_orders:
-            await self.db.add(leg_order)
+        # Add the order and its legs in one flush
+        await self.db.add_all([order, *leg_orders])
+        # Inside client.transaction() the order is only visible to the fill loop once it commits
+        await self.db.after_commit(self._notify_fill_check)
         
         if self._use_raw_data:
-            return order.__dict__
+            return _row_dict(order, _ORDER_COLS)
         
-        return AlpacaOrder(**order.__dict__)
+        return self._to_model(AlpacaOrder, _row_dict(order, _ORDER_COLS))
+
+    async def submit_orders(
+        self, orders: List[OrderRequest]
+    ) -> List[Union[AlpacaOrder, RawData, Exception]]:
+        """Creates several simulated orders. SQLite serializes writes, so they are submitted one by one.
+        As with the live client, a failed order's exception is returned in its slot instead of raised"""
+        results = []
+        for order_data in orders:
+            try:
+                results.append(await self.submit_order(order_data))
+            except Exception as e:
+                results.append(e)
+        return results
 
     async def get_orders(
         self, filter: Optional[GetOrdersRequest] = None
     ) -> Union[List[AlpacaOrder], RawData]:
         """Gets all simulated orders"""
-        stmt = select(Order)
+        # Only column values are returned, so select those and skip building ORM objects
+        stmt = select(*Order.__table__.columns)
         
         if filter:
             if filter.status:
@@ -392,42 +570,38 @@ class SimulationTradingClient:
             if filter.limit:
                 stmt = stmt.limit(filter.limit)
         
-        result = await self.db.execute(stmt)
-        orders = list(result.scalars().all())
+        orders = _mapping_dicts(await self.db.execute(stmt))
         
         if self._use_raw_data:
-            return [order.__dict__ for order in orders]
+            return orders
         
-        return [AlpacaOrder(**order.__dict__) for order in orders]
+        return [self._to_model(AlpacaOrder, values) for values in orders]
 
     async def get_order_by_id(
         self, order_id: Union[UUID, str], filter: Optional[GetOrderByIdRequest] = None
     ) -> Union[AlpacaOrder, RawData]:
         """Returns a specific order by its order id."""
-        order = await self.db.get(Order, str(order_id))
+        order = await self.db.get_order_values(UUID(str(order_id)))
         
         if not order:
             raise ValueError(f"Order with id {order_id} not found")
         
         if self._use_raw_data:
-            return order.__dict__
+            return order
         
-        return AlpacaOrder(**order.__dict__)
+        return self._to_model(AlpacaOrder, order)
 
     async def get_order_by_client_id(self, client_id: str) -> Union[AlpacaOrder, RawData]:
         """Returns a specific order by its client order id."""
-        async with self.db.async_session() as session:
-            stmt = select(Order).where(Order.client_order_id == client_id)
-            result = await session.execute(stmt)
-            order = result.scalar_one_or_none()
-            
-            if not order:
-                raise ValueError(f"Order with client_id {client_id} not found")
-            
-            if self._use_raw_data:
-                return order.__dict__
-            
-            return AlpacaOrder(**order.__dict__)
+        order = await self.db.get_order_values_by_client_id(client_id)
+        
+        if not order:
+            raise ValueError(f"Order with client_id {client_id} not found")
+        
+        if self._use_raw_data:
+            return order
+        
+        return self._to_model(AlpacaOrder, order)
 
     async def replace_order_by_id(
         self,
@@ -435,7 +609,7 @@ class SimulationTradingClient:
         order_data: Optional[ReplaceOrderRequest] = None,
     ) -> Union[AlpacaOrder, RawData]:
         """Updates an order with new parameters."""
-        order = await self.db.get(Order, str(order_id))
+        order = await self.db.get(Order, UUID(str(order_id)))
         
         if not order:
             raise ValueError(f"Order with id {order_id} not found")
@@ -443,37 +617,40 @@ class SimulationTradingClient:
         if order_data:
             update_data = order_data.model_dump(exclude_unset=True)
             await self.db.update(order, **update_data, updated_at=datetime.now())
+            await self.db.after_commit(self._notify_fill_check)
         
         if self._use_raw_data:
-            return order.__dict__
+            return _row_dict(order, _ORDER_COLS)
         
-        return AlpacaOrder(**order.__dict__)
+        return self._to_model(AlpacaOrder, _row_dict(order, _ORDER_COLS))
 
     async def cancel_orders(self) -> Union[List[CancelOrderResponse], RawData]:
         """Cancels all orders."""
-        async with self.db.async_session() as session:
-            stmt = select(Order).where(Order.status.in_(["new", "accepted", "partially_filled"]))
-            result = await session.execute(stmt)
-            orders = list(result.scalars().all())
-            
-            now = datetime.now()
-            responses = []
-            
-            for order in orders:
-                await self.db.update(order,
-                    status="canceled",
-                    canceled_at=now
-                )
-                responses.append({"id": order.id, "status": 200})
-            
-            if self._use_raw_data:
-                return responses
-            
-            return [CancelOrderResponse(**resp) for resp in responses]
+        async with self.db.transaction() as session:
+            order_ids = await self._cancel_open_orders(session)
+        
+        responses = [{"id": order_id, "status": 200} for order_id in order_ids]
+        
+        if self._use_raw_data:
+            return responses
+        
+        return [CancelOrderResponse(**resp) for resp in responses]
+
+    async def _cancel_open_orders(self, session: AsyncSession) -> List[UUID]:
+        """Cancel all open orders as part of the caller's transaction, returning their ids"""
+        # One UPDATE for all open orders, the ids come back through RETURNING
+        stmt = (
+            update(Order)
+            .where(Order.status.in_(OPEN_ORDER_STATUSES))
+            .values(status="canceled", canceled_at=datetime.now())
+            .returning(Order.id)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
 
     async def cancel_order_by_id(self, order_id: Union[UUID, str]) -> None:
         """Cancels a specific order by its order id."""
-        order = await self.db.get(Order, str(order_id))
+        order = await self.db.get(Order, UUID(str(order_id)))
         
         if not order:
             raise ValueError(f"Order with id {order_id} not found")
@@ -485,59 +662,93 @@ class SimulationTradingClient:
 
     async def get_all_positions(self) -> Union[List[AlpacaPosition], RawData]:
         """Gets all the current open positions."""
-        positions = await self.db.get_all(Position)
+        positions = [
+            _position_dict(values)
+            for values in _mapping_dicts(await self.db.execute(select(*Position.__table__.columns)))
+        ]
         
         if self._use_raw_data:
-            return [pos.__dict__ for pos in positions]
+            return positions
         
-        return [AlpacaPosition(**pos.__dict__) for pos in positions]
+        return [self._to_model(AlpacaPosition, values) for values in positions]
 
     async def get_open_position(
         self, symbol_or_asset_id: Union[UUID, str]
     ) -> Union[AlpacaPosition, RawData]:
         """Gets the open position for an account for a single asset."""
-        position = await self.db.get_position(str(symbol_or_asset_id))
-        
-        if not position:
-            raise ValueError(f"Position for {symbol_or_asset_id} not found")
+        key = str(symbol_or_asset_id)
+        values = self._position_cache.get(key)
+        if values is not None:
+            self._position_cache.move_to_end(key)
+        else:
+            generation = self._position_cache_generation
+            position = await self.db.get_position(key)
+            
+            if not position:
+                raise ValueError(f"Position for {symbol_or_asset_id} not found")
+            
+            values = _position_dict(_row_dict(position, _POSITION_COLS))
+            # A fill committed during the read may have made this row stale, only cache it otherwise
+            if generation == self._position_cache_generation:
+                self._position_cache[key] = values
+                if len(self._position_cache) > _POSITION_CACHE_SIZE:
+                    self._position_cache.popitem(last=False)
         
         if self._use_raw_data:
-            return position.__dict__
+            return dict(values)
         
-        return AlpacaPosition(**position.__dict__)
+        return self._to_model(AlpacaPosition, values)
 
     async def close_all_positions(
         self, cancel_orders: Optional[bool] = None
     ) -> Union[List[ClosePositionResponse], RawData]:
         """Liquidates all positions for an account."""
-        if cancel_orders:
-            await self.cancel_orders()
-        
-        positions = await self.db.get_all(Position)
-        responses = []
-        
-        for position in positions:
-            # Create closing order
-            order = Order(
-                id=str(uuid4()),
-                client_order_id=str(uuid4()),
-                created_at=datetime.now(),
-                submitted_at=datetime.now(),
-                symbol=position.symbol,
-                qty=position.qty,
-                side="sell" if position.side == "long" else "buy",
-                type="market",
-                time_in_force="day",
-                status="filled"
-            )
-            await self.db.add(order)
-            await self.db.delete(position)
+        # Canceling and closing share one transaction and one commit
+        try:
+            async with self.db.transaction() as session:
+                if cancel_orders:
+                    await self._cancel_open_orders(session)
+            
+                result = await session.execute(
+                    select(Position.id, Position.symbol, Position.qty, Position.side)
+                )
+                positions = result.all()
+                now = datetime.now()
             
-            responses.append({
-                "symbol": position.symbol,
-                "status": 200,
-                "order_id": order.id
-            })
+                # Closing orders are plain rows, no ORM objects or unit-of-work bookkeeping
+                orders = [
+                    {
+                        "id": uuid4(),
+                        "client_order_id": str(uuid4()),
+                        "created_at": now,
+                        "submitted_at": now,
+                        "symbol": position.symbol,
+                        "qty": str(position.qty),
+                        "side": "sell" if position.side == "long" else "buy",
+                        "type": "market",
+                        "time_in_force": "day",
+                        "status": "filled"
+                    }
+                    for position in positions
+                ]
+                responses = [
+                    {
+                        "symbol": order["symbol"],
+                        "status": 200,
+                        "order_id": order["id"]
+                    }
+                    for order in orders
+                ]
+            
+                # One executemany INSERT for the orders and one DELETE for the positions
+                if positions:
+                    await session.execute(insert(Order), orders)
+                    await session.execute(
+                        delete(Position).where(Position.id.in_([position.id for position in positions]))
+                    )
+        finally:
+            # Dropped even if the commit fails
+            self._invalidate_position_cache()
         
         if self._use_raw_data:
             return responses
@@ -556,26 +767,29 @@ class SimulationTradingClient:
             raise ValueError(f"Position for {symbol_or_asset_id} not found")
         
         # Create closing order
+        now = datetime.now()
         order = Order(
-            id=str(uuid4()),
             client_order_id=str(uuid4()),
-            created_at=datetime.now(),
-            submitted_at=datetime.now(),
+            created_at=now,
+            submitted_at=now,
             symbol=position.symbol,
-            qty=position.qty if not close_options else str(close_options.qty),
+            qty=str(position.qty) if not close_options else str(close_options.qty),
             side="sell" if position.side == "long" else "buy",
             type="market",
             time_in_force="day",
             status="filled"
         )
         
-        await self.db.add(order)
-        await self.db.delete(position)
+        try:
+            await self.db.add(order)
+            await self.db.delete(position)
+        finally:
+            self._invalidate_position_cache()
         
         if self._use_raw_data:
-            return order.__dict__
+            return _row_dict(order, _ORDER_COLS)
         
-        return AlpacaOrder(**order.__dict__)
+        return self._to_model(AlpacaOrder, _row_dict(order, _ORDER_COLS))
 
     async def get_portfolio_history(
         self,
@@ -601,7 +815,7 @@ class SimulationTradingClient:
         self, filter: Optional[GetAssetsRequest] = None
     ) -> Union[List[AlpacaAsset], RawData]:
         """Gets list of assets."""
-        stmt = select(Asset)
+        stmt = select(*Asset.__table__.columns)
         
         if filter:
             if filter.status:
@@ -609,13 +823,12 @@ class SimulationTradingClient:
             if filter.asset_class:
                 stmt = stmt.where(Asset.asset_class == filter.asset_class)
         
-        result = await self.db.execute(stmt)
-        assets = list(result.scalars().all())
+        assets = _mapping_dicts(await self.db.execute(stmt))
         
         if self._use_raw_data:
-            return [asset.__dict__ for asset in assets]
+            return assets
         
-        return [AlpacaAsset(**asset.__dict__) for asset in assets]
+        return [self._to_model(AlpacaAsset, values) for values in assets]
 
     async def get_asset(self, symbol_or_asset_id: Union[UUID, str]) -> Union[AlpacaAsset, RawData]:
         """Gets a specific asset."""
@@ -625,18 +838,23 @@ class SimulationTradingClient:
             raise ValueError(f"Asset {symbol_or_asset_id} not found")
         
         if self._use_raw_data:
-            return asset.__dict__
+            return _row_dict(asset, _ASSET_COLS)
         
-        return AlpacaAsset(**asset.__dict__)
+        return self._to_model(AlpacaAsset, _row_dict(asset, _ASSET_COLS))
 
     async def get_account(self) -> Union[TradeAccount, RawData]:
         """Gets account details."""
+        if self._account_cache is not None:
+            values = self._account_cache
+            if self._use_raw_data:
+                return dict(values)
+            return self._to_model(TradeAccount, values)
+        
         account = await self.db.get_account()
         
         if not account:
             # Create default account if none exists
             account = Account(
-                id=str(uuid4()),
                 cash="100000",
                 buying_power="100000",
                 created_at=datetime.now(),
@@ -649,25 +867,23 @@ class SimulationTradingClient:
             )
             await self.db.add(account)
         
+        # Nothing in the simulation writes to the account after it is created
+        values = self._account_cache = _row_dict(account, _ACCOUNT_COLS)
+        
         if self._use_raw_data:
-            return account.__dict__
+            return dict(values)
         
-        return TradeAccount(**account.__dict__)
+        return self._to_model(TradeAccount, values)
 
     async def get_account_configurations(self) -> Union[AccountConfiguration, RawData]:
         """Gets account configuration."""
-        config = {
-            "dtbp_check": "both",
-            "no_shorting": False,
-            "suspend_trade": False,
-            "trade_confirm_email": "all",
-            "trade_suspended_by_user": False
-        }
-        
         if self._use_raw_data:
-            return config
+            return dict(DEFAULT_ACCOUNT_CONFIGURATION)
+        
+        if self._account_configuration is None:
+            self._account_configuration = AccountConfiguration(**DEFAULT_ACCOUNT_CONFIGURATION)
         
-        return AccountConfiguration(**config)
+        return self._account_configuration
 
     async def set_account_configurations(
         self, account_configurations: AccountConfiguration
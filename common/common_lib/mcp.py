@@ -1,9 +1,18 @@
 import asyncio
 from datetime import datetime
 from typing import Literal
+from zoneinfo import ZoneInfo
 from mcp.server.fastmcp import FastMCP
 from mcp.server.lowlevel.server import request_ctx
-import pytz
+
+# Market timezone, built once at import instead of on every call
+MARKET_TZ = ZoneInfo("America/New_York")
+
+# Coroutine method that serves each transport
+_TRANSPORTS = {
+    "stdio": "run_stdio_async",
+    "sse": "run_sse_async",
+}
 
 class AsyncioFastMCP(FastMCP):
     def run(self, transport: Literal["stdio", "sse"] = "stdio") -> None:
@@ -12,21 +21,19 @@ class AsyncioFastMCP(FastMCP):
         Args:
             transport: Transport protocol to use ("stdio" or "sse")
         """
-        if transport == "stdio":
-            asyncio.run(self.run_stdio_async())
-        elif transport == "sse":
-            asyncio.run(self.run_sse_async())
-        else:
+        runner = getattr(self, _TRANSPORTS.get(transport, ""), None)
+        if runner is None:
             raise ValueError(f"Invalid transport: {transport}")
+        asyncio.run(runner())
 
 
 def get_current_market_time() -> datetime:
     request_context = request_ctx.get()
     if not hasattr(request_context.meta, "marketTime") or request_context.meta.marketTime == "realtime":
-        return datetime.now(tz=pytz.timezone("US/Eastern"))
+        return datetime.now(tz=MARKET_TZ)
     else:
         parsed = datetime.fromisoformat(request_context.meta.marketTime).replace(tzinfo=None)
-        return pytz.timezone("US/Eastern").localize(parsed)
+        return parsed.replace(tzinfo=MARKET_TZ)
 
 def is_realtime() -> bool:
     request_context = request_ctx.get()
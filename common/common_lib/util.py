@@ -1,22 +1,49 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+import time
+from typing import Optional
 
-from common_lib.mcp import get_current_market_time
-from pytz import timezone
+from common_lib.mcp import MARKET_TZ, get_current_market_time, is_realtime
+
+# Suffix for a count, indexed by count != 1
+_PLURAL = ("", "s")
+
+# Regular session in minutes after midnight Eastern, 9:30 to 16:00
+_MARKET_OPEN_MINUTE = 9 * 60 + 30
+_MARKET_CLOSE_MINUTE = 16 * 60
+
+
+def _is_session_time(now: datetime) -> bool:
+    if now.weekday() >= 5:
+        return False
+    return _MARKET_OPEN_MINUTE <= now.hour * 60 + now.minute < _MARKET_CLOSE_MINUTE
+
+
+@lru_cache(maxsize=4)
+def _is_session_minute(epoch_minute: int) -> bool:
+    return _is_session_time(datetime.fromtimestamp(epoch_minute * 60, MARKET_TZ))
 
 
 def is_market_open():
-    now = get_current_market_time()
-    return now.weekday() < 5 and (10 <= now.hour < 16 or now.hour == 9 and now.minute >= 30)
+    # Realtime answers only change once a minute, replayed market times are checked as given
+    if is_realtime():
+        return _is_session_minute(int(time.time()) // 60)
+    return _is_session_time(get_current_market_time())
 
 
-def datetime_to_time_ago(timestamp: datetime) -> str:
-    time_diff = get_current_market_time() - timestamp
+def datetime_to_time_ago(timestamp: datetime, now: Optional[datetime] = None) -> str:
+    # Callers formatting many timestamps can read the clock once and pass it in
+    if now is None:
+        now = get_current_market_time()
+    time_diff = now - timestamp
     if time_diff < timedelta(minutes=1):
-        time_ago_string = "just now"
-    elif time_diff < timedelta(minutes=60):
-        time_ago_string = f"{time_diff.seconds // 60} minute{'s' if time_diff.seconds // 60 > 1 else ''} ago"
-    elif time_diff < timedelta(days=1):
-        time_ago_string = f"{time_diff.seconds // 3600} hour{'s' if time_diff.seconds // 3600 > 1 else ''} ago"
-    else:
-        time_ago_string = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-    return time_ago_string
\ No newline at end of file
+        return "just now"
+    if time_diff < timedelta(days=1):
+        seconds = time_diff.seconds
+        if seconds < 3600:
+            minutes = seconds // 60
+            return "%d minute%s ago" % (minutes, _PLURAL[minutes != 1])
+        hours = seconds // 3600
+        return "%d hour%s ago" % (hours, _PLURAL[hours != 1])
+    days = time_diff.days
+    return "%d day%s ago" % (days, _PLURAL[days != 1])
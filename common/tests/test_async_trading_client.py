@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+from alpaca.trading.enums import (
+    AssetClass,
+    ContractType,
+    OrderSide,
+    QueryOrderStatus,
+    TimeInForce,
+)
+from alpaca.trading.requests import (
+    ClosePositionRequest,
+    GetAssetsRequest,
+    GetOptionContractsRequest,
+    GetOrdersRequest,
+    GetPortfolioHistoryRequest,
+    LimitOrderRequest,
+    MarketOrderRequest,
+    ReplaceOrderRequest,
+    StopLossRequest,
+    TakeProfitRequest,
+)
+
+from common_lib.alpaca_helpers.async_impl.trading_client import (
+    AsyncTradingClient,
+    _request_fields,
+)
+
+
+class RequestFieldsTest(unittest.TestCase):
+    def test_matches_to_request_fields(self):
+        requests = [
+            MarketOrderRequest(
+                symbol="AAPL", qty=1, side=OrderSide.BUY, time_in_force=TimeInForce.DAY
+            ),
+            LimitOrderRequest(
+                symbol="AAPL",
+                notional=100.5,
+                side=OrderSide.SELL,
+                time_in_force=TimeInForce.GTC,
+                limit_price=150,
+                client_order_id=str(uuid4()),
+                take_profit=TakeProfitRequest(limit_price=160),
+                stop_loss=StopLossRequest(stop_price=140),
+            ),
+            GetOrdersRequest(
+                status=QueryOrderStatus.OPEN,
+                limit=10,
+                after=datetime(2025, 1, 2, 9, 30),
+                until=datetime(2025, 1, 3, 16, tzinfo=timezone.utc),
+                symbols=["AAPL", "MSFT"],
+            ),
+            GetOptionContractsRequest(
+                underlying_symbols=["AAPL", "SPY"],
+                type=ContractType.CALL,
+                expiration_date=date(2025, 1, 17),
+                strike_price_gte="100",
+            ),
+            GetAssetsRequest(asset_class=AssetClass.US_EQUITY),
+            ReplaceOrderRequest(qty=2, limit_price=151),
+            ClosePositionRequest(percentage="50"),
+            GetPortfolioHistoryRequest(period="1M", timeframe="1D"),
+            # Nothing set
+            GetAssetsRequest(),
+        ]
+        for request in requests:
+            with self.subTest(request=type(request).__name__):
+                self.assertEqual(_request_fields(request), request.to_request_fields())
+
+
+class IterOptionContractsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = AsyncTradingClient("key", "secret", raw_data=True)
+        self.request = GetOptionContractsRequest(underlying_symbols=["AAPL", "SPY"])
+        self.calls = []
+        self.pages = {
+            None: {"option_contracts": [{"symbol": "A"}], "next_page_token": "p2"},
+            "p2": {"option_contracts": [{"symbol": "B"}], "next_page_token": "p3"},
+            "p3": {"option_contracts": [{"symbol": "C"}], "next_page_token": None},
+        }
+        self.canceled = []
+
+        async def get(path, params):
+            page_token = params.get("page_token")
+            self.calls.append((path, params))
+            try:
+                # Let the consumer run before the page arrives
+                await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                self.canceled.append(page_token)
+                raise
+            return self.pages[page_token]
+
+        self.client.get = get
+
+    async def test_yields_every_page(self):
+        pages = [page async for page in self.client.iter_option_contracts(self.request)]
+
+        self.assertEqual(pages, [[{"symbol": "A"}], [{"symbol": "B"}], [{"symbol": "C"}]])
+        self.assertEqual(
+            [params.get("page_token") for _, params in self.calls], [None, "p2", "p3"]
+        )
+        for path, params in self.calls:
+            self.assertEqual(path, "/options/contracts")
+            self.assertEqual(params["underlying_symbols"], "AAPL,SPY")
+
+    async def test_prefetches_next_page(self):
+        pages = self.client.iter_option_contracts(self.request)
+        self.assertEqual(await pages.__anext__(), [{"symbol": "A"}])
+
+        # The second page is requested while the caller still holds the first
+        await asyncio.sleep(0)
+        self.assertEqual([params.get("page_token") for _, params in self.calls], [None, "p2"])
+
+        await pages.aclose()
+
+    async def test_closing_cancels_prefetch(self):
+        pages = self.client.iter_option_contracts(self.request)
+        await pages.__anext__()
+        await asyncio.sleep(0)
+
+        await pages.aclose()
+        # Give the canceled task a chance to unwind
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.canceled, ["p2"])
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from alpaca.trading.enums import OrderSide, OrderStatus, OrderType, TimeInForce
+from alpaca.trading.requests import LimitOrderRequest, MarketOrderRequest, StopOrderRequest
+
+from common_lib.alpaca_helpers.simulation.db import MarketData
+from common_lib.alpaca_helpers.simulation.trading_client import SimulationTradingClient
+
+
+class SimulatedOrderModelTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "simulation_trading.db")
+        self.request = LimitOrderRequest(
+            symbol="AAPL",
+            qty=1,
+            side=OrderSide.BUY,
+            time_in_force=TimeInForce.DAY,
+            limit_price=1,
+        )
+        self.clients = []
+        for validate_models in (True, False):
+            client = SimulationTradingClient(
+                db_path=f"sqlite+aiosqlite:///{db_path}.{validate_models}",
+                validate_models=validate_models,
+            )
+            await client.db.initialize()
+            self.clients.append(client)
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.db.close()
+        self.tmpdir.cleanup()
+
+    async def test_order_enums_read_back(self):
+        for client in self.clients:
+            with self.subTest(validate_models=client._validate_models):
+                order = await client.submit_order(self.request)
+                self.assertEqual(order.status.value, OrderStatus.NEW.value)
+
+                order = await client.get_order_by_id(order.id)
+                self.assertEqual(order.status.value, "new")
+                self.assertEqual(order.side.value, "buy")
+                self.assertEqual(order.type.value, OrderType.LIMIT.value)
+                self.assertFalse(order.extended_hours)
+
+                orders = await client.get_orders()
+                self.assertEqual([o.status.value for o in orders], ["new"])
+
+
+class SimulatedFillTest(unittest.IsolatedAsyncioTestCase):
+    """Fills run against the latest stored close: AAPL at 100, MSFT at 300"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "simulation_trading.db")
+        self.client = SimulationTradingClient(db_path=f"sqlite+aiosqlite:///{db_path}", raw_data=True)
+        await self.client.db.initialize()
+
+        now = datetime.now()
+        await self.client.db.add_all([
+            MarketData(
+                symbol=symbol,
+                timestamp=now - timedelta(minutes=minutes),
+                open=price,
+                high=price,
+                low=price,
+                # Older bars close higher, only the latest one should price the fills
+                close=price + minutes,
+                volume=10,
+                timeframe="1min",
+            )
+            for symbol, price in (("AAPL", 100.0), ("MSFT", 300.0))
+            for minutes in range(5)
+        ])
+
+    async def asyncTearDown(self):
+        await self.client.db.close()
+        self.tmpdir.cleanup()
+
+    async def submit(self, symbol, side, qty=1, limit_price=None, stop_price=None):
+        common = dict(symbol=symbol, qty=qty, side=side, time_in_force=TimeInForce.DAY)
+        if limit_price is not None:
+            request = LimitOrderRequest(limit_price=limit_price, **common)
+        elif stop_price is not None:
+            request = StopOrderRequest(stop_price=stop_price, **common)
+        else:
+            request = MarketOrderRequest(**common)
+        return await self.client.submit_order(request)
+
+    async def status(self, order):
+        order = await self.client.get_order_by_id(order["id"])
+        return order["status"], order["filled_avg_price"]
+
+    async def test_market_limit_and_stop_fills(self):
+        market = await self.submit("AAPL", OrderSide.BUY, qty=2)
+        limit_buy = await self.submit("AAPL", OrderSide.BUY, limit_price=150)
+        limit_sell = await self.submit("AAPL", OrderSide.SELL, limit_price=90)
+        stop_sell = await self.submit("MSFT", OrderSide.SELL, stop_price=500)
+        stop_buy = await self.submit("MSFT", OrderSide.BUY, stop_price=250)
+
+        await self.client._fill_open_orders()
+
+        self.assertEqual(await self.status(market), ("filled", "100.0"))
+        # Limit orders fill at their limit, stop orders at the market price
+        self.assertEqual(await self.status(limit_buy), ("filled", "150.0"))
+        self.assertEqual(await self.status(limit_sell), ("filled", "90.0"))
+        self.assertEqual(await self.status(stop_sell), ("filled", "300.0"))
+        self.assertEqual(await self.status(stop_buy), ("filled", "300.0"))
+
+    async def test_orders_away_from_the_market_stay_open(self):
+        orders = [
+            await self.submit("AAPL", OrderSide.BUY, limit_price=99),
+            await self.submit("AAPL", OrderSide.SELL, limit_price=101),
+            await self.submit("MSFT", OrderSide.SELL, stop_price=299),
+            await self.submit("MSFT", OrderSide.BUY, stop_price=301),
+            # No prices for this symbol yet
+            await self.submit("TSLA", OrderSide.BUY),
+        ]
+
+        await self.client._fill_open_orders()
+
+        for order in orders:
+            self.assertEqual(await self.status(order), ("new", None))
+        self.assertEqual(await self.client.get_all_positions(), [])
+
+    async def test_buy_to_cover_short(self):
+        await self.submit("MSFT", OrderSide.SELL, qty=3)
+        await self.client._fill_open_orders()
+
+        position = await self.client.get_open_position("MSFT")
+        self.assertEqual((position["side"], position["qty"]), ("short", "3.0"))
+
+        await self.submit("MSFT", OrderSide.BUY, qty=1)
+        await self.client._fill_open_orders()
+
+        position = await self.client.get_open_position("MSFT")
+        self.assertEqual((position["side"], position["qty"]), ("short", "2.0"))
+        self.assertEqual(position["avg_entry_price"], "300.0")
+
+        await self.submit("MSFT", OrderSide.BUY, qty=2)
+        await self.client._fill_open_orders()
+
+        with self.assertRaises(ValueError):
+            await self.client.get_open_position("MSFT")
+
+    async def test_cancel_orders(self):
+        filled = await self.submit("AAPL", OrderSide.BUY)
+        await self.client._fill_open_orders()
+        open_orders = [
+            await self.submit("AAPL", OrderSide.BUY, limit_price=1),
+            await self.submit("MSFT", OrderSide.SELL, limit_price=1000),
+        ]
+
+        responses = await self.client.cancel_orders()
+
+        self.assertCountEqual(
+            responses, [{"id": order["id"], "status": 200} for order in open_orders]
+        )
+        for order in open_orders:
+            self.assertEqual((await self.status(order))[0], "canceled")
+        self.assertEqual((await self.status(filled))[0], "filled")
+
+        # Canceled orders don't fill once the price gets there
+        await self.client._fill_open_orders()
+        for order in open_orders:
+            self.assertEqual((await self.status(order))[0], "canceled")
+
+    async def test_position_cache_skips_reads_raced_by_a_fill(self):
+        await self.submit("AAPL", OrderSide.BUY, qty=2)
+        await self.client._fill_open_orders()
+
+        get_position = self.client.db.get_position
+
+        async def get_position_during_fill(symbol_or_id):
+            position = await get_position(symbol_or_id)
+            # A fill commits while the read is in flight
+            self.client._invalidate_position_cache()
+            return position
+
+        self.client.db.get_position = get_position_during_fill
+        await self.client.get_open_position("AAPL")
+        self.assertNotIn("AAPL", self.client._position_cache)
+
+        self.client.db.get_position = get_position
+        await self.client.get_open_position("AAPL")
+        self.assertIn("AAPL", self.client._position_cache)
+
+        # The next fill drops the cached row and the read after it sees the new quantity
+        await self.submit("AAPL", OrderSide.BUY, qty=1)
+        await self.client._fill_open_orders()
+        self.assertNotIn("AAPL", self.client._position_cache)
+        position = await self.client.get_open_position("AAPL")
+        self.assertEqual(position["qty"], "3.0")
+
+    async def test_fill_check_waits_for_the_transaction_to_commit(self):
+        version = self.client._fill_check_version
+        await self.submit("AAPL", OrderSide.BUY)
+        self.assertEqual(self.client._fill_check_version, version + 1)
+
+        version = self.client._fill_check_version
+        async with self.client.transaction():
+            await self.submit("AAPL", OrderSide.BUY)
+            await self.submit("MSFT", OrderSide.BUY)
+            self.assertEqual(self.client._fill_check_version, version)
+        # One wake-up for the whole transaction
+        self.assertEqual(self.client._fill_check_version, version + 1)
+
+        with self.assertRaises(RuntimeError):
+            async with self.client.transaction():
+                await self.submit("AAPL", OrderSide.BUY)
+                raise RuntimeError
+        self.assertEqual(self.client._fill_check_version, version + 1)
+        self.assertEqual(len(await self.client.get_orders()), 3)
+
+    async def test_close_all_positions(self):
+        await self.submit("AAPL", OrderSide.BUY, qty=2)
+        await self.submit("MSFT", OrderSide.SELL, qty=1)
+        await self.client._fill_open_orders()
+        pending = await self.submit("AAPL", OrderSide.BUY, limit_price=1)
+        # Cached before the close, must not be served after it
+        await self.client.get_open_position("AAPL")
+
+        responses = await self.client.close_all_positions(cancel_orders=True)
+
+        self.assertEqual(sorted(r["symbol"] for r in responses), ["AAPL", "MSFT"])
+        self.assertEqual(await self.client.get_all_positions(), [])
+        with self.assertRaises(ValueError):
+            await self.client.get_open_position("AAPL")
+        self.assertEqual((await self.status(pending))[0], "canceled")
+
+        closing = {}
+        for response in responses:
+            order = await self.client.get_order_by_id(response["order_id"])
+            closing[order["symbol"]] = (order["side"], order["qty"], order["type"], order["status"])
+        self.assertEqual(closing, {
+            "AAPL": ("sell", "2.0", "market", "filled"),
+            "MSFT": ("buy", "1.0", "market", "filled"),
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 import logging
 import math
 from typing import Optional
@@ -6,12 +8,18 @@ from common_lib.alpaca_helpers.async_impl.stock_client import (
     AsyncStockHistoricalDataClient,
 )
 from common_lib.alpaca_helpers.env import AlpacaSettings
-from common_lib.mcp import get_current_market_time, is_realtime
+from common_lib.mcp import MARKET_TZ, get_current_market_time, is_realtime
 import pandas as pd
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from pandas.tseries.offsets import BDay, BusinessHour
-from ta.indicators import add_indicators_to_bars_df, indicator_min_bars_back, plot_bars
+from ta.indicators import (
+    Indicator,
+    add_indicators_to_bars_df,
+    indicator_min_bars_back,
+    parse_indicator,
+    plot_bars,
+)
 from mcp.server.fastmcp import Image
 
 # Initialize Alpaca client
@@ -44,108 +52,129 @@ SUPPORTED_INDICATORS = {
     }
 }
 
+# Bar fields returned by the bars tools, trade_count is left out
+BAR_COLUMNS = ("open", "high", "low", "close", "volume", "vwap")
+
+# Recently fetched bars without indicators, keyed by request and evicted least recently used first
+_BARS_CACHE_SIZE = 64
+_bars_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+
 logger = logging.getLogger(__name__)
 
 
+_TIMEFRAME_UNITS = {
+    "MINUTE": TimeFrameUnit.Minute,
+    "HOUR": TimeFrameUnit.Hour,
+    "DAILY": TimeFrameUnit.Day,
+    "WEEKLY": TimeFrameUnit.Week,
+    "MONTHLY": TimeFrameUnit.Month,
+}
+
+# Default lookback per unit in that unit, divided by bar_size to get a bar count
+_DEFAULT_LOOKBACK = {
+    "HOUR": 5 * 24,  # 1 week
+    "DAILY": 30,  # 30 days
+    "WEEKLY": 26,  # 26 weeks
+    "MONTHLY": 12,  # 12 months
+}
+
+# Minute bars look back further the wider they are, as (bar sizes below, lookback in minutes)
+_MINUTE_LOOKBACK = (
+    (5, 120),  # 2 hours
+    (15, 60 * 7),  # 1 day
+    (30, 60 * 13),  # 2 days
+)
+
+
+@lru_cache(maxsize=128)
 def get_timeframe(unit: str, bar_size: int) -> TimeFrame:
     """Convert unit and bar_size to Alpaca TimeFrame"""
     unit = unit.upper()
-    if unit == "MINUTE":
-        if bar_size <= 59:
-            return TimeFrame(amount=bar_size, unit=TimeFrameUnit.Minute)
-        else:
-            return TimeFrame(amount=bar_size // 60, unit=TimeFrameUnit.Hour)
-    elif unit == "HOUR":
-        return TimeFrame(amount=bar_size, unit=TimeFrameUnit.Hour)
-    elif unit == "DAILY":
-        return TimeFrame(amount=bar_size, unit=TimeFrameUnit.Day)
-    elif unit == "WEEKLY":
-        return TimeFrame(amount=bar_size, unit=TimeFrameUnit.Week)
-    elif unit == "MONTHLY":
-        return TimeFrame(amount=bar_size, unit=TimeFrameUnit.Month)
-    else:
+    timeframe_unit = _TIMEFRAME_UNITS.get(unit)
+    if timeframe_unit is None:
         raise ValueError(f"Unsupported unit: {unit}")
+    if timeframe_unit is TimeFrameUnit.Minute and bar_size > 59:
+        return TimeFrame(amount=bar_size // 60, unit=TimeFrameUnit.Hour)
+    return TimeFrame(amount=bar_size, unit=timeframe_unit)
 
 
 def default_bars_back(unit: str, bar_size: int) -> int:
     unit = unit.upper()
-    if unit == "MINUTE" and bar_size < 5:
-        return 120 // bar_size  # 2 hours
-    elif unit == "MINUTE" and bar_size < 15:
-        return 60 * 7 // bar_size  # 1 day
-    elif unit == "MINUTE" and bar_size < 30:
-        return 60 * 13 // bar_size  # 2 days
-    elif unit == "HOUR":
-        return 5 * 24 // bar_size  # 1 week
-    elif unit == "DAILY":
-        return 30 // bar_size  # 30 days
-    elif unit == "WEEKLY":
-        return 26 // bar_size  # 26 weeks
-    elif unit == "MONTHLY":
-        return 12 // bar_size  # 12 months
+    if unit == "MINUTE":
+        for below, minutes in _MINUTE_LOOKBACK:
+            if bar_size < below:
+                return minutes // bar_size
     else:
-        raise ValueError(f"Unknown unit: {unit}")
+        lookback = _DEFAULT_LOOKBACK.get(unit)
+        if lookback is not None:
+            return lookback // bar_size
+    raise ValueError(f"Unknown unit: {unit}")
 
 
-def bars_back_to_datetime(
-    unit: str, bar_size: int, bars_back: int
-) -> datetime:
-    now = get_current_market_time()
-    if unit == "Minute":
-        total_minutes = bars_back * bar_size
-        hours = (total_minutes // 60) + 1
-        return bars_back_to_datetime("Hour", 1, hours)
-
-    elif unit == "Hour":
+@lru_cache(maxsize=32)
+def _bars_offset(unit: str, bar_size: int):
+    """Business-time length of one bar, built once per (unit, bar_size)"""
+    if unit == "Hour":
         # 1 'business hour' bar => skip Sat/Sun
-        interval = BusinessHour(n=bar_size, start="09:30", end="16:00")
+        return BusinessHour(n=bar_size, start="09:30", end="16:00")
 
     elif unit == "Daily":
         # 1 'business day' bar => skip Sat/Sun
-        interval = BDay(n=bar_size)
+        return BDay(n=bar_size)
 
     elif unit == "Weekly":
         # 1 'weekly' bar => treat that as 5 business days
-        interval = BDay(n=5 * bar_size)
+        return BDay(n=5 * bar_size)
 
     elif unit == "Monthly":
         # Often approximate 21 business days per month
-        interval = BDay(n=21 * bar_size)
+        return BDay(n=21 * bar_size)
 
     else:
         raise ValueError(f"Unknown unit: {unit}")
-        
+
+
+@lru_cache(maxsize=256)
+def _parsed_indicators(indicators: str) -> tuple[tuple[Indicator, ...], int]:
+    """Parse an indicators spec once, with the most bars back any of them needs"""
+    indicator_list = tuple(parse_indicator(i.strip()) for i in indicators.split(","))
+    return indicator_list, max(indicator_min_bars_back(i) for i in indicator_list)
+
+
+def bars_back_to_datetime(
+    unit: str, bar_size: int, bars_back: int, now: Optional[datetime] = None
+) -> datetime:
+    if unit == "Minute":
+        total_minutes = bars_back * bar_size
+        hours = (total_minutes // 60) + 1
+        return bars_back_to_datetime("Hour", 1, hours, now)
+
+    if now is None:
+        now = get_current_market_time()
+    interval = _bars_offset(unit, bar_size)
     return now - (interval * (bars_back + 10)) # the + 10 is a safety margin
 
 
-async def get_alpaca_bars(
+async def _fetch_bars_df(
     symbol: str,
     unit: str,
-    bars_back: Optional[int] = None,
-    bar_size: int = 1,
-    indicators: Optional[str] = None,
-    truncate_bars: bool = True,
-) -> str:
-    """Get historical bars data for a stock symbol"""
-    timeframe = get_timeframe(unit, bar_size)
-    original_bars_back = bars_back or default_bars_back(unit, bar_size)
-
-    if indicators:
-        min_bars_back = max(indicator_min_bars_back(i) for i in indicators.split(","))
-        bars_back = min_bars_back + (bars_back or 0)
-    else:
-        bars_back = original_bars_back
-
-    start = bars_back_to_datetime(unit, bar_size, bars_back)
-    if is_realtime() or timeframe.unit in [TimeFrameUnit.Minute, TimeFrameUnit.Hour]:
-        end = get_current_market_time()
+    bar_size: int,
+    bars_back: int,
+    timeframe: TimeFrame,
+    now: datetime,
+    realtime: bool,
+) -> pd.DataFrame:
+    """Request bars from Alpaca, indexed by naive US/Eastern datetimes"""
+    start = bars_back_to_datetime(unit, bar_size, bars_back, now)
+    if realtime or timeframe.unit in [TimeFrameUnit.Minute, TimeFrameUnit.Hour]:
+        end = now
     else:
         if timeframe.unit == TimeFrameUnit.Day:
-            end = get_current_market_time() - timedelta(days=1)
+            end = now - timedelta(days=1)
         elif timeframe.unit == TimeFrameUnit.Week:
-            end = get_current_market_time() - timedelta(days=7)
+            end = now - timedelta(days=7)
         elif timeframe.unit == TimeFrameUnit.Month:
-            end = get_current_market_time() - timedelta(days=30)
+            end = now - timedelta(days=30)
             
     # Create the request
     request = StockBarsRequest(
@@ -157,28 +186,90 @@ async def get_alpaca_bars(
         feed="iex",  # todo: switch to SIP when subscribed to real time alpaca data
     )
 
-    # Get the bars
-    bars_df = (await stock_client.get_stock_bars(request)).df
+    # Get the bars, built straight from the response with only the columns we return
+    bars_df = await stock_client.get_stock_bars_df(request, columns=BAR_COLUMNS)
     if isinstance(bars_df.index, pd.MultiIndex):
         bars_df = bars_df.xs(symbol)
 
-    bars_df.drop(columns=["trade_count"], inplace=True)
     # Convert index timezone to US/Eastern
-    bars_df.index = bars_df.index.tz_convert("US/Eastern").tz_localize(None)
+    bars_df.index = bars_df.index.tz_convert(MARKET_TZ).tz_localize(None)
+    return bars_df
+
+
+async def _get_alpaca_bars_df(
+    symbol: str,
+    unit: str,
+    bars_back: Optional[int] = None,
+    bar_size: int = 1,
+    indicators: Optional[str] = None,
+) -> pd.DataFrame:
+    """Get historical bars with indicators, indexed by naive US/Eastern datetimes"""
+    timeframe = get_timeframe(unit, bar_size)
+    original_bars_back = bars_back or default_bars_back(unit, bar_size)
+
+    if indicators:
+        indicator_list, min_bars_back = _parsed_indicators(indicators)
+        bars_back = min_bars_back + (bars_back or 0)
+    else:
+        bars_back = original_bars_back
+
+    now = get_current_market_time()
+    realtime = is_realtime()
+    # Keyed on unit and bar_size rather than the timeframe, as they also decide the start date.
+    # Realtime requests within the same minute share bars, replayed ones share an exact market time
+    cache_key = (
+        symbol,
+        unit,
+        bar_size,
+        bars_back,
+        now.replace(second=0, microsecond=0) if realtime else now,
+    )
+    bars_df = _bars_cache.get(cache_key)
+    if bars_df is None:
+        bars_df = await _fetch_bars_df(symbol, unit, bar_size, bars_back, timeframe, now, realtime)
+        _bars_cache[cache_key] = bars_df
+        if len(_bars_cache) > _BARS_CACHE_SIZE:
+            _bars_cache.popitem(last=False)
+    else:
+        _bars_cache.move_to_end(cache_key)
+    # Indicators are added to a copy so the cached frame stays bare
+    bars_df = bars_df.copy()
 
     # Add indicators if requested
     if indicators:
-        indicator_list = [i.strip() for i in indicators.split(",")]
-        add_indicators_to_bars_df(bars_df, indicator_list)
+        add_indicators_to_bars_df(bars_df, list(indicator_list))
+
+    return bars_df
+
 
-    # Format datetime
-    bars_df = bars_df.reset_index()
-    bars_df["timestamp"] = bars_df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
-    bars_df = bars_df.rename(columns={"timestamp": "datetime"})
+def _bars_to_json(bars_df: pd.DataFrame) -> str:
+    """Serialize bars as JSON lines, with the index formatted into a datetime column"""
+    bars_df = bars_df.copy(deep=False)
+    bars_df.index = bars_df.index.strftime("%Y-%m-%d %H:%M:%S")
+    bars_df.index.name = "datetime"
+    return bars_df.reset_index().to_json(orient="records", lines=True)
+
+
+async def get_alpaca_bars(
+    symbol: str,
+    unit: str,
+    bars_back: Optional[int] = None,
+    bar_size: int = 1,
+    indicators: Optional[str] = None,
+    truncate_bars: bool = True,
+) -> str:
+    """Get historical bars data for a stock symbol"""
+    bars_df = await _get_alpaca_bars_df(
+        symbol=symbol,
+        unit=unit,
+        bars_back=bars_back,
+        bar_size=bar_size,
+        indicators=indicators,
+    )
     if truncate_bars:
-        bars_df = bars_df.iloc[-original_bars_back:]
+        bars_df = bars_df.iloc[-(bars_back or default_bars_back(unit, bar_size)):]
 
-    return bars_df.to_json(orient="records", lines=True)
+    return _bars_to_json(bars_df)
 
 
 async def plot_alpaca_bars_with_indicators(
@@ -190,23 +281,14 @@ async def plot_alpaca_bars_with_indicators(
 ) -> tuple[Image, str]:
     """Plot bars with indicators using Alpaca data"""
     plot_bar_count = max(bars_back, default_bars_back(unit, bar_size))
-    bars_df = pd.read_json(
-        await get_alpaca_bars(
-            symbol=symbol,
-            unit=unit,
-            bar_size=bar_size,
-            indicators=indicators,
-            bars_back=plot_bar_count,
-            truncate_bars=False,
-        ),
-        lines=True,
-        orient="records",
+    # The frame is used as is, no JSON round trip between fetching and plotting
+    bars_df = await _get_alpaca_bars_df(
+        symbol=symbol,
+        unit=unit,
+        bar_size=bar_size,
+        indicators=indicators,
+        bars_back=plot_bar_count,
     )
-
-    bars_df["datetime"] = pd.to_datetime(
-        bars_df["datetime"], format="%Y-%m-%d %H:%M:%S"
-    )
-    bars_df.set_index("datetime", inplace=True)
     total_time_span = (bars_df.index[-1] - bars_df.iloc[-plot_bar_count:].index[0]).total_seconds() / 60 / 60
     time_span_str = f"{int(math.ceil(total_time_span))} hours"
     if unit == "Daily":
@@ -222,12 +304,8 @@ async def plot_alpaca_bars_with_indicators(
         f"{symbol}\nbar size: {bar_size}\nbar unit: {unit}\ntotal time span: {time_span_str}",
     )
 
-    bars_df.reset_index(inplace=True)
-    bars_df["datetime"] = bars_df["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S")
-
     # Return both the image and the data
     return (
         Image(data=buf.read(), format="png"),
-        bars_df.iloc[-(bars_back or plot_bar_count):]
-        .to_json(orient="records", lines=True),
+        _bars_to_json(bars_df.iloc[-(bars_back or plot_bar_count):]),
     )
@@ -21,24 +21,20 @@ async def get_news(symbols: str, days_back: int = 1) -> str:
     Returns:
         str
     """
+    now = get_current_market_time()
     request = NewsRequest(
         symbols=symbols,
-        start=get_current_market_time() - timedelta(days=days_back),
-        end=get_current_market_time(),
+        start=now - timedelta(days=days_back),
+        end=now,
         sort="asc",
     )
-    all_news = []
-    news = await news_client.get_news(request)
-    all_news.extend(news.data["news"])
-    while news.next_page_token:
-        request.next_page_token = news.next_page_token
-        news = news_client.get_news(request)
-        all_news.extend(news.data["news"])
+    # The client follows next_page_token itself, so this already holds every page
+    all_news = (await news_client.get_news(request)).data["news"]
 
-    news_string = ""
-    for news_item in all_news:
-        when = datetime_to_time_ago(news_item.updated_at)
-        news_string += f"*{news_item.headline}*\n{when}\n{news_item.summary}\n\n"
+    news_string = "".join(
+        f"*{news_item.headline}*\n{datetime_to_time_ago(news_item.updated_at, now)}\n{news_item.summary}\n\n"
+        for news_item in all_news
+    )
 
     return news_string or "No news found"
 
@@ -56,7 +52,7 @@ async def latest_headline(symbol: str) -> str:
     if len(news_items) == 0:
         return "No headline from the past 4 hours"
 
-    return f"*{news_items[0].headline}*\n{datetime_to_time_ago(news_items[0].updated_at)}"
+    return f"*{news_items[0].headline}*\n{datetime_to_time_ago(news_items[0].updated_at, market_time)}"
 
 
 latest_headline_resource = ResourceTemplate(
@@ -1,6 +1,7 @@
 import matplotlib
 
 matplotlib.use("Agg")
+from functools import lru_cache
 import io
 import logging
 import pandas_ta
@@ -12,77 +13,82 @@ import mplfinance as mpf
 logger = logging.getLogger(__name__)
 
 
-def indicator_min_bars_back(indicator: str) -> int:
-    """Return the minimum number of bars back required for an indicator"""
-    if indicator.startswith("sma_"):
-        return int(indicator.split("_")[1])
-    elif indicator.startswith("ema_"):
-        return int(indicator.split("_")[1])
-    elif indicator.startswith("rsi_"):
-        return int(indicator.split("_")[1])
-    elif indicator.startswith("macd_"):
-        return max(
-            int(indicator.split("_")[1]),
-            int(indicator.split("_")[2]),
-            int(indicator.split("_")[3]),
-        )
-    elif indicator.startswith("bbands_"):
-        return int(indicator.split("_")[1])
+def _add_sma(bars: pd.DataFrame, period: int):
+    bars[f"sma_{period}"] = bars["close"].rolling(period).mean()
+
+
+def _add_ema(bars: pd.DataFrame, period: int):
+    bars[f"ema_{period}"] = bars["close"].ewm(span=period).mean()
+
+
+def _add_rsi(bars: pd.DataFrame, window_period: int):
+    bars[f"rsi_{window_period}"] = pandas_ta.rsi(bars["close"], window_period)
+
+
+def _add_macd(bars: pd.DataFrame, fast_period: int, slow_period: int, signal_period: int):
+    macd = pandas_ta.macd(bars["close"], fast_period, slow_period, signal_period)
+    suffix = f"{fast_period}_{slow_period}_{signal_period}"
+    bars[f"macd_{suffix}"] = macd.iloc[:, 0]
+    bars[f"macd_signal_{suffix}"] = macd.iloc[:, 2]
+    bars[f"macd_histogram_{suffix}"] = macd.iloc[:, 1]
+
+
+def _add_bbands(bars: pd.DataFrame, window_period: int, num_std: int):
+    bbands = pandas_ta.bbands(bars["close"], window_period, num_std)
+    bars[f"bbands_{window_period}_{num_std}_upper"] = bbands.iloc[:, 0]
+    bars[f"bbands_{window_period}_{num_std}_mid"] = bbands.iloc[:, 1]
+    bars[f"bbands_{window_period}_{num_std}_lower"] = bbands.iloc[:, 2]
+
+
+# Column writer per indicator kind, called with the indicator's parameters
+_INDICATOR_FUNCS = {
+    "sma": _add_sma,
+    "ema": _add_ema,
+    "rsi": _add_rsi,
+    "macd": _add_macd,
+    "bbands": _add_bbands,
+}
+
+# Indicator kinds with integer parameters, e.g. "macd_12_26_9" -> ("macd", (12, 26, 9))
+Indicator = tuple[str, tuple[int, ...]]
+
+
+@lru_cache(maxsize=512)
+def parse_indicator(indicator: str) -> Indicator:
+    """Split an indicator name into its kind and integer parameters, once per name"""
+    kind, _, params = indicator.partition("_")
+    if kind not in _INDICATOR_FUNCS:
+        # Unknown indicators are ignored downstream, so their parameters aren't parsed
+        return kind, ()
+    try:
+        return kind, tuple(map(int, params.split("_")))
+    except ValueError:
+        # Missing or non-numeric parameters ("sma", "rsi_x") leave the kind without any
+        return kind, ()
+
+
+def indicator_min_bars_back(indicator: Indicator) -> int:
+    """Return the minimum number of bars back required for a parsed indicator"""
+    kind, params = indicator
+    if not params:
+        return 1
+    if kind == "macd":
+        return max(params[:3])
+    elif kind in _INDICATOR_FUNCS:
+        return params[0]
     return 1
 
 
-# Reuse your existing add_indicators function
-def add_indicators_to_bars_df(bars: pd.DataFrame, indicators: list[str]):
+def add_indicators_to_bars_df(bars: pd.DataFrame, indicators: list[Indicator]):
     """Add technical indicators to the bars dataframe"""
-    for indicator in indicators:
-        if indicator.startswith("sma_"):
-            period = int(indicator.split("_")[1])
-            try:
-                bars[f"sma_{period}"] = bars["close"].rolling(period).mean()
-            except Exception as e:
-                logger.debug(f"Error calculating SMA {period}: {e}")
-        elif indicator.startswith("ema_"):
-            period = int(indicator.split("_")[1])
-            try:
-                bars[f"ema_{period}"] = bars["close"].ewm(span=period).mean()
-            except Exception as e:
-                logger.debug(f"Error calculating EMA {period}: {e}")
-        elif indicator.startswith("rsi_"):
-            window_period = int(indicator.split("_")[1])
-            try:
-                bars[f"rsi_{window_period}"] = pandas_ta.rsi(
-                    bars["close"], window_period
-                )
-            except Exception as e:
-                logger.debug(f"Error calculating RSI {window_period}: {e}")
-        elif indicator.startswith("macd_"):
-            fast_period, slow_period, signal_period = map(int, indicator.split("_")[1:])
-            try:
-                macd = pandas_ta.macd(
-                    bars["close"], fast_period, slow_period, signal_period
-                )
-                bars[f"macd_{fast_period}_{slow_period}_{signal_period}"] = macd.iloc[
-                    :, 0
-                ]
-                bars[f"macd_signal_{fast_period}_{slow_period}_{signal_period}"] = (
-                    macd.iloc[:, 2]
-                )
-                bars[f"macd_histogram_{fast_period}_{slow_period}_{signal_period}"] = (
-                    macd.iloc[:, 1]
-                )
-            except Exception as e:
-                logger.debug(
-                    f"Error calculating MACD {fast_period}_{slow_period}_{signal_period}: {e}"
-                )
-        elif indicator.startswith("bbands_"):
-            window_period, num_std = map(int, indicator.split("_")[1:])
-            try:
-                bbands = pandas_ta.bbands(bars["close"], window_period, num_std)
-                bars[f"bbands_{window_period}_{num_std}_upper"] = bbands.iloc[:, 0]
-                bars[f"bbands_{window_period}_{num_std}_mid"] = bbands.iloc[:, 1]
-                bars[f"bbands_{window_period}_{num_std}_lower"] = bbands.iloc[:, 2]
-            except Exception as e:
-                logger.debug(f"Error calculating BBands {window_period}_{num_std}: {e}")
+    for kind, params in indicators:
+        add_indicator = _INDICATOR_FUNCS.get(kind)
+        if add_indicator is None:
+            continue
+        try:
+            add_indicator(bars, *params)
+        except Exception as e:
+            logger.debug(f"Error calculating {kind.upper()} {'_'.join(map(str, params))}: {e}")
 
 
 def plot_bars(bars: pd.DataFrame, title: str):
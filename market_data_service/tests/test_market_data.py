@@ -0,0 +1,87 @@
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+
+# The module builds its Alpaca client on import
+os.environ.setdefault("ALPACA_API_KEY", "key")
+os.environ.setdefault("ALPACA_API_SECRET", "secret")
+
+from alpaca_api import market_data
+from common_lib.mcp import MARKET_TZ
+
+
+def _bars(*args, **kwargs) -> pd.DataFrame:
+    index = pd.date_range("2025-01-02 14:00", periods=3, freq="min", tz="UTC")
+    return pd.DataFrame(
+        {column: [1.0, 2.0, 3.0] for column in market_data.BAR_COLUMNS}, index=index
+    )
+
+
+class BarsCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        market_data._bars_cache.clear()
+        self.get_bars = mock.AsyncMock(side_effect=_bars)
+        self.now = datetime(2025, 1, 2, 10, 30, 15, tzinfo=MARKET_TZ)
+        self.realtime = False
+        for target, new in (
+            (market_data.stock_client, {"get_stock_bars_df": self.get_bars}),
+            (market_data, {"get_current_market_time": lambda: self.now}),
+            (market_data, {"is_realtime": lambda: self.realtime}),
+        ):
+            patcher = mock.patch.multiple(target, **new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(market_data._bars_cache.clear)
+
+    async def test_repeated_request_is_served_from_cache(self):
+        first = await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        second = await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+
+        self.assertEqual(self.get_bars.await_count, 1)
+        pd.testing.assert_frame_equal(first, second)
+
+    async def test_key_includes_unit_and_bar_size(self):
+        # One hour either way, but the start date differs with the unit
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60, bar_size=60)
+        await market_data._get_alpaca_bars_df("AAPL", "Hour", 60, bar_size=1)
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60, bar_size=30)
+
+        self.assertEqual(self.get_bars.await_count, 3)
+        starts = {call.args[0].start for call in self.get_bars.await_args_list}
+        self.assertEqual(len(starts), 3)
+
+    async def test_key_includes_symbol_bars_back_and_market_time(self):
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        await market_data._get_alpaca_bars_df("MSFT", "Minute", 60)
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 30)
+        self.now = self.now.replace(second=45)
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+
+        self.assertEqual(self.get_bars.await_count, 4)
+
+    async def test_realtime_requests_share_the_minute(self):
+        self.realtime = True
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        self.now = self.now.replace(second=45)
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        self.assertEqual(self.get_bars.await_count, 1)
+
+        self.now = self.now.replace(minute=31)
+        await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        self.assertEqual(self.get_bars.await_count, 2)
+
+    async def test_indicators_do_not_leak_into_cache(self):
+        bars = await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+        bars["sma_2"] = 0.0
+
+        cached = await market_data._get_alpaca_bars_df("AAPL", "Minute", 60)
+
+        self.assertEqual(self.get_bars.await_count, 1)
+        self.assertNotIn("sma_2", cached.columns)
+
+
+if __name__ == "__main__":
+    unittest.main()